@@ -25,7 +25,9 @@ import sys
 import os
 import re
 import warnings
+import itertools
 import types
+import inspect
 import unicodedata
 
 # ==============================
@@ -121,9 +123,11 @@ class Node(object):
         Return true if we should stop the traversal.
         """
         stop = 0
-        visitor.document.reporter.debug(
-            'docutils.nodes.Node.walk calling dispatch_visit for %s'
-            % self.__class__.__name__)
+        reporter = visitor.document.reporter
+        if reporter.debug_flag:
+            reporter.debug(
+                'docutils.nodes.Node.walk calling dispatch_visit for %s'
+                % self.__class__.__name__)
         try:
             try:
                 visitor.dispatch_visit(self)
@@ -157,9 +161,11 @@ class Node(object):
         """
         call_depart = 1
         stop = 0
-        visitor.document.reporter.debug(
-            'docutils.nodes.Node.walkabout calling dispatch_visit for %s'
-            % self.__class__.__name__)
+        reporter = visitor.document.reporter
+        if reporter.debug_flag:
+            reporter.debug(
+                'docutils.nodes.Node.walkabout calling dispatch_visit for %s'
+                % self.__class__.__name__)
         try:
             try:
                 visitor.dispatch_visit(self)
@@ -180,29 +186,96 @@ class Node(object):
         except StopTraversal:
             stop = 1
         if call_depart:
-            visitor.document.reporter.debug(
-                'docutils.nodes.Node.walkabout calling dispatch_departure '
-                'for %s' % self.__class__.__name__)
+            if reporter.debug_flag:
+                reporter.debug(
+                    'docutils.nodes.Node.walkabout calling dispatch_departure '
+                    'for %s' % self.__class__.__name__)
             visitor.dispatch_departure(self)
         return stop
 
     def _fast_traverse(self, cls):
         """Specialized traverse() that only supports instance checks."""
         result = []
-        if isinstance(self, cls):
-            result.append(self)
-        for child in self.children:
-            result.extend(child._fast_traverse(cls))
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, cls):
+                result.append(node)
+            if node.children:
+                stack.extend(node.children[::-1])
         return result
 
     def _all_traverse(self):
         """Specialized traverse() that doesn't check for a condition."""
         result = []
-        result.append(self)
-        for child in self.children:
-            result.extend(child._all_traverse())
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            result.append(node)
+            if node.children:
+                stack.extend(node.children[::-1])
         return result
 
+    def _iter_descendants(self, condition, include_self):
+        """
+        Generate `self` (if include_self is true) and its descendants in tree
+        traversal order, for which ``condition(node)`` is true (or all of
+        them if `condition` is None).
+        """
+        if include_self and (condition is None or condition(self)):
+            yield self
+        stack = [iter(self.children)]
+        while stack:
+            for child in stack[-1]:
+                if condition is None or condition(child):
+                    yield child
+                if child.children:
+                    stack.append(iter(child.children))
+                    break
+            else:
+                stack.pop()
+
+    def iter_traverse(self, condition=None,
+                      include_self=1, descend=1, siblings=0, ascend=0):
+        """
+        Return an iterator over the nodes that `traverse()` (which see)
+        returns, in the same order, for the same parameters.
+
+        Nothing is collected in advance: the nodes are found as the iterator
+        is consumed, so stopping early saves the rest of the traversal.  In
+        return, the tree must not be modified while the iterator is in use;
+        use `traverse()` for that.
+        """
+        if ascend:
+            siblings=1
+        if isinstance(condition, (types.ClassType, type)):
+            node_class = condition
+            def condition(node, node_class=node_class):
+                return isinstance(node, node_class)
+        if descend:
+            iterable = self._iter_descendants(condition, include_self)
+        elif include_self and (condition is None or condition(self)):
+            iterable = [self]
+        else:
+            iterable = []
+        for node in iterable:
+            yield node
+        if siblings or ascend:
+            node = self
+            while node.parent:
+                index = node.parent.index(node)
+                for sibling in node.parent[index+1:]:
+                    if descend:
+                        for descendant in sibling._iter_descendants(
+                            condition, 1):
+                            yield descendant
+                    elif condition is None or condition(sibling):
+                        yield sibling
+                if not ascend:
+                    break
+                else:
+                    node = node.parent
+
     def traverse(self, condition=None,
                  include_self=1, descend=1, siblings=0, ascend=0):
         """
@@ -249,33 +322,10 @@ class Node(object):
                 return self._all_traverse()
             elif isinstance(condition, (types.ClassType, type)):
                 return self._fast_traverse(condition)
-        # Check if `condition` is a class (check for TypeType for Python
-        # implementations that use only new-style classes, like PyPy).
-        if isinstance(condition, (types.ClassType, type)):
-            node_class = condition
-            def condition(node, node_class=node_class):
-                return isinstance(node, node_class)
-        r = []
-        if include_self and (condition is None or condition(self)):
-            r.append(self)
-        if descend and len(self.children):
-            for child in self:
-                r.extend(child.traverse(
-                    include_self=1, descend=1, siblings=0, ascend=0,
-                    condition=condition))
-        if siblings or ascend:
-            node = self
-            while node.parent:
-                index = node.parent.index(node)
-                for sibling in node.parent[index+1:]:
-                    r.extend(sibling.traverse(include_self=1, descend=descend,
-                                              siblings=0, ascend=0,
-                                              condition=condition))
-                if not ascend:
-                    break
-                else:
-                    node = node.parent
-        return r
+        return list(self.iter_traverse(condition=condition,
+                                       include_self=include_self,
+                                       descend=descend, siblings=siblings,
+                                       ascend=ascend))
 
     def next_node(self, condition=None,
                   include_self=0, descend=1, siblings=0, ascend=0):
@@ -286,13 +336,12 @@ class Node(object):
         Parameter list is the same as of traverse.  Note that
         include_self defaults to 0, though.
         """
-        iterable = self.traverse(condition=condition,
-                                 include_self=include_self, descend=descend,
-                                 siblings=siblings, ascend=ascend)
-        try:
-            return iterable[0]
-        except IndexError:
-            return None
+        for node in self.iter_traverse(condition=condition,
+                                       include_self=include_self,
+                                       descend=descend, siblings=siblings,
+                                       ascend=ascend):
+            return node
+        return None
 
 if sys.version_info < (3,):
     class reprunicode(unicode):
@@ -382,6 +431,33 @@ class Text(Node, reprunicode):
     def lstrip(self, chars=None):
         return self.__class__(reprunicode.lstrip(self, chars))
 
+
+_element_serial = itertools.count(1).next
+"""Return the next element serial number; see `_created`."""
+
+_created = {}
+"""
+The census of element classes: a mapping of `Element` subclasses to the
+serial number of their most recently created instance.  See
+`document.may_contain()`.
+"""
+
+_census_classes = {}
+"""
+Mapping of class tuples to ``(len(_created), classes)`` pairs, where
+`classes` are the keys of `_created` which are subclasses of the tuple.
+"""
+
+def _created_subclasses(classes):
+    """Return the classes in `_created` which are subclasses of `classes`."""
+    known, subclasses = _census_classes.get(classes, (None, None))
+    if known != len(_created):          # classes only ever get added
+        subclasses = [cls for cls in _created.keys()
+                      if issubclass(cls, classes)]
+        _census_classes[classes] = (len(_created), subclasses)
+    return subclasses
+
+
 class Element(Node):
 
     """
@@ -431,6 +507,8 @@ class Element(Node):
     """Separator for child nodes, used by `astext()` method."""
 
     def __init__(self, rawsource='', *children, **attributes):
+        _created[self.__class__] = _element_serial()
+
         self.rawsource = rawsource
         """The raw text from which this element was constructed."""
 
@@ -891,6 +969,10 @@ class document(Root, Structural, Element):
     def __init__(self, settings, reporter, *args, **kwargs):
         Element.__init__(self, *args, **kwargs)
 
+        self.census_serial = _created[self.__class__]
+        """Serial number of this document: elements created later are
+        counted in its census (see `may_contain()`).  None if unknown."""
+
         self.current_source = None
         """Path to or description of the input source being processed."""
 
@@ -984,8 +1066,24 @@ class document(Root, Structural, Element):
         state = self.__dict__.copy()
         state['reporter'] = None
         state['transformer'] = None
+        state['census_serial'] = None   # the census is per process
         return state
 
+    def may_contain(self, classes):
+        """
+        Return false if the document certainly contains no instances of
+        `classes` (an `Element` subclass or a tuple of classes), because
+        none have been created since the document was.  (Elements created
+        before the document and added to it later are not counted.)
+        """
+        serial = getattr(self, 'census_serial', None)
+        if serial is None:
+            return 1
+        for cls in _created_subclasses(classes):
+            if _created[cls] > serial:
+                return 1
+        return 0
+
     def asdom(self, dom=None):
         """Return a DOM representation of this document."""
         if dom is None:
@@ -1592,7 +1690,19 @@ class NodeVisitor:
         Call self."``visit_`` + node class name" with `node` as
         parameter.  If the ``visit_...`` method does not exist, call
         self.unknown_visit.
+
+        The method for each node class is looked up once per visitor class
+        and kept in a table (see `_dispatch_method()`).
         """
+        if not self.document.reporter.debug_flag:
+            try:
+                method = _visit_tables[self.__class__][node.__class__]
+            except KeyError:
+                method = _dispatch_method(_visit_tables, self.__class__,
+                                          'visit_', node.__class__)
+            if method is None:
+                return self.unknown_visit(node)
+            return method(self, node)
         node_name = node.__class__.__name__
         method = getattr(self, 'visit_' + node_name, self.unknown_visit)
         self.document.reporter.debug(
@@ -1605,7 +1715,18 @@ class NodeVisitor:
         Call self."``depart_`` + node class name" with `node` as
         parameter.  If the ``depart_...`` method does not exist, call
         self.unknown_departure.
+
+        Departure methods are looked up and kept like visit methods.
         """
+        if not self.document.reporter.debug_flag:
+            try:
+                method = _departure_tables[self.__class__][node.__class__]
+            except KeyError:
+                method = _dispatch_method(_departure_tables, self.__class__,
+                                          'depart_', node.__class__)
+            if method is None:
+                return self.unknown_departure(node)
+            return method(self, node)
         node_name = node.__class__.__name__
         method = getattr(self, 'depart_' + node_name, self.unknown_departure)
         self.document.reporter.debug(
@@ -1638,6 +1759,44 @@ class NodeVisitor:
                 % (self.__class__, node.__class__.__name__))
 
 
+_visit_tables = {}
+"""
+Mapping of `NodeVisitor` subclasses to their visit method tables: mappings of
+node classes to the functions `NodeVisitor.dispatch_visit()` calls for them.
+"""
+
+_departure_tables = {}
+"""Like `_visit_tables`, for `NodeVisitor.dispatch_departure()`."""
+
+def _dispatch_method(tables, visitor_class, prefix, node_class):
+    """
+    Find the method of `visitor_class` named `prefix` + the name of
+    `node_class`, save it in `tables`, and return it as a function taking
+    the visitor and the node, or None if there is no such method.
+
+    Visitor classes that gain or lose ``visit_...`` or ``depart_...``
+    methods once they have been used must call `_reset_dispatch_tables()`.
+    """
+    name = prefix + node_class.__name__
+    method = None
+    for klass in inspect.getmro(visitor_class):
+        if name in klass.__dict__:
+            method = klass.__dict__[name]
+            if type(method) is not types.FunctionType:
+                # Not a plain method (a static method, say); look it up
+                # the usual way each time.
+                def method(visitor, node, name=name):
+                    return getattr(visitor, name)(node)
+            break
+    tables.setdefault(visitor_class, {})[node_class] = method
+    return method
+
+def _reset_dispatch_tables():
+    """Forget the methods found by `_dispatch_method()`."""
+    _visit_tables.clear()
+    _departure_tables.clear()
+
+
 class SparseNodeVisitor(NodeVisitor):
 
     """
@@ -1690,6 +1849,7 @@ def _add_node_class_names(names):
         setattr(GenericNodeVisitor, "depart_" + _name, _call_default_departure)
         setattr(SparseNodeVisitor, 'visit_' + _name, _nop)
         setattr(SparseNodeVisitor, 'depart_' + _name, _nop)
+    _reset_dispatch_tables()
 
 _add_node_class_names(node_class_names)
 
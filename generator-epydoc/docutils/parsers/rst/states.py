@@ -107,7 +107,7 @@ import sys
 import re
 import roman
 from types import FunctionType, MethodType
-from docutils import nodes, statemachine, utils, urischemes
+from docutils import nodes, statemachine, utils, urischemes, regexcache
 from docutils import ApplicationError, DataError
 from docutils.statemachine import StateMachineWS, StateWS
 from docutils.nodes import fully_normalize_name as normalize_name
@@ -133,6 +133,35 @@ class Struct:
         self.__dict__.update(keywordargs)
 
 
+class LazyPatterns:
+
+    """
+    Stores regular expressions for dotted-attribute access, compiling each
+    one the first time it is used.
+    """
+
+    def __init__(self, **definitions):
+        """
+        Keyword arguments map attribute names to (pattern, flags) pairs.
+        """
+        self._definitions = definitions
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            pattern, flags = self._definitions[name]
+        except KeyError:
+            raise AttributeError(name)
+        compiled = regexcache.compile(pattern, flags)
+        setattr(self, name, compiled)
+        return compiled
+
+    def definition(self, name):
+        """Return the (pattern, flags) pair for the attribute `name`."""
+        return self._definitions[name]
+
+
 class RSTStateMachine(StateMachineWS):
 
     """
@@ -455,7 +484,7 @@ def build_regexp(definition, compile=1):
     or_group = '|'.join(part_strings)
     regexp = '%(prefix)s(?P<%(name)s>%(or_group)s)%(suffix)s' % locals()
     if compile:
-        return re.compile(regexp, re.UNICODE)
+        return regexcache.compile(regexp, re.UNICODE)
     else:
         return regexp
 
@@ -585,13 +614,13 @@ class Inliner:
                )
               ]
              )
-    patterns = Struct(
-          initial=build_regexp(parts),
-          emphasis=re.compile(non_whitespace_escape_before
-                              + r'(\*)' + end_string_suffix),
-          strong=re.compile(non_whitespace_escape_before
-                            + r'(\*\*)' + end_string_suffix),
-          interpreted_or_phrase_ref=re.compile(
+    patterns = LazyPatterns(
+          initial=(build_regexp(parts, None), re.UNICODE),
+          emphasis=(non_whitespace_escape_before
+                    + r'(\*)' + end_string_suffix, 0),
+          strong=(non_whitespace_escape_before
+                  + r'(\*\*)' + end_string_suffix, 0),
+          interpreted_or_phrase_ref=(
               r"""
               %(non_whitespace_escape_before)s
               (
@@ -603,7 +632,7 @@ class Inliner:
               )
               %(end_string_suffix)s
               """ % locals(), re.VERBOSE | re.UNICODE),
-          embedded_uri=re.compile(
+          embedded_uri=(
               r"""
               (
                 (?:[ \n]+|^)            # spaces or beginning of line/string
@@ -615,15 +644,15 @@ class Inliner:
               )
               $                         # end of string
               """ % locals(), re.VERBOSE),
-          literal=re.compile(non_whitespace_before + '(``)'
-                             + end_string_suffix),
-          target=re.compile(non_whitespace_escape_before
-                            + r'(`)' + end_string_suffix),
-          substitution_ref=re.compile(non_whitespace_escape_before
-                                      + r'(\|_{0,2})'
-                                      + end_string_suffix),
-          email=re.compile(email_pattern % locals() + '$', re.VERBOSE),
-          uri=re.compile(
+          literal=(non_whitespace_before + '(``)'
+                   + end_string_suffix, 0),
+          target=(non_whitespace_escape_before
+                  + r'(`)' + end_string_suffix, 0),
+          substitution_ref=(non_whitespace_escape_before
+                            + r'(\|_{0,2})'
+                            + end_string_suffix, 0),
+          email=(email_pattern % locals() + '$', re.VERBOSE),
+          uri=(
                 (r"""
                 %(start_string_prefix)s
                 (?P<whole>
@@ -655,7 +684,7 @@ class Inliner:
                 )
                 %(end_string_suffix)s
                 """) % locals(), re.VERBOSE),
-          pep=re.compile(
+          pep=(
                 r"""
                 %(start_string_prefix)s
                 (
@@ -664,12 +693,22 @@ class Inliner:
                   (PEP\s+(?P<pepnum2>\d+))      # reference by name
                 )
                 %(end_string_suffix)s""" % locals(), re.VERBOSE),
-          rfc=re.compile(
+          rfc=(
                 r"""
                 %(start_string_prefix)s
                 (RFC(-|\s+)?(?P<rfcnum>\d+))
                 %(end_string_suffix)s""" % locals(), re.VERBOSE))
 
+    implicit_literals = {patterns.definition('uri'): (':', '@'),
+                         patterns.definition('pep'): ('pep-', 'PEP'),
+                         patterns.definition('rfc'): ('RFC',)}
+    """
+    Mapping of implicit markup patterns, as (pattern, flags) pairs, to
+    strings at least one of which occurs in any text the pattern matches.
+    Used by `self.implicit_inline` to rule out patterns with simple
+    substring tests; patterns not listed here are always searched for.
+    """
+
     def quoted_start(self, match):
         """Return 1 if inline markup start-string is 'quoted', 0 if not."""
         string = match.string
@@ -973,10 +1012,21 @@ class Inliner:
         and dispatch to the stored method for the pattern.  Recursively check
         the text before and after the match.  Return a list of `nodes.Text`
         and inline element nodes.
+
+        Patterns that `self.implicit_literals` shows can't match the text are
+        skipped without searching, so most text needs no regexp pass at all.
         """
         if not text:
             return []
+        literals = self.implicit_literals
         for pattern, method in self.implicit_dispatch:
+            definition = (pattern.pattern, pattern.flags)
+            if definition in literals:
+                for literal in literals[definition]:
+                    if literal in text:
+                        break
+                else:
+                    continue
             match = pattern.search(text)
             if match:
                 try:
@@ -1042,16 +1092,16 @@ class Body(RSTState):
 
     enum.sequenceregexps = {}
     for sequence in enum.sequences:
-        enum.sequenceregexps[sequence] = re.compile(
+        enum.sequenceregexps[sequence] = regexcache.compile(
               enum.sequencepats[sequence] + '$')
 
-    grid_table_top_pat = re.compile(r'\+-[-+]+-\+ *$')
+    grid_table_top_pat = regexcache.compile(r'\+-[-+]+-\+ *$')
     """Matches the top (& bottom) of a full table)."""
 
-    simple_table_top_pat = re.compile('=+( +=+)+ *$')
+    simple_table_top_pat = regexcache.compile('=+( +=+)+ *$')
     """Matches the top of a simple table."""
 
-    simple_table_border_pat = re.compile('=+[ =]*$')
+    simple_table_border_pat = regexcache.compile('=+[ =]*$')
     """Matches the bottom & header bottom of a simple table."""
 
     pats = {}
@@ -1135,7 +1185,8 @@ class Body(RSTState):
         return elements
 
     # U+2014 is an em-dash:
-    attribution_pattern = re.compile(u'(---?(?!-)|\u2014) *(?=[^ \\n])')
+    attribution_pattern = regexcache.compile(
+        u'(---?(?!-)|\u2014) *(?=[^ \\n])')
 
     def split_attribution(self, indented, line_offset):
         """
@@ -1773,7 +1824,7 @@ class Body(RSTState):
     """Patterns and constants used for explicit markup recognition."""
 
     explicit.patterns = Struct(
-          target=re.compile(r"""
+          target=regexcache.compile(r"""
                             (
                               _               # anonymous target
                             |               # *OR*
@@ -1793,7 +1844,7 @@ class Body(RSTState):
                             :               # end of reference name
                             ([ ]+|$)        # followed by whitespace
                             """ % vars(Inliner), re.VERBOSE),
-          reference=re.compile(r"""
+          reference=regexcache.compile(r"""
                                (
                                  (?P<simple>%(simplename)s)_
                                |                  # *OR*
@@ -1806,7 +1857,7 @@ class Body(RSTState):
                                )
                                $                  # end of string
                                """ % vars(Inliner), re.VERBOSE | re.UNICODE),
-          substitution=re.compile(r"""
+          substitution=regexcache.compile(r"""
                                   (
                                     (?![ ])          # first char. not space
                                     (?P<name>.+?)    # substitution text
@@ -1998,7 +2049,7 @@ class Body(RSTState):
                 del substitution_node[i]
             else:
                 i += 1
-        for node in substitution_node.traverse(nodes.Element):
+        for node in substitution_node.iter_traverse(nodes.Element):
             if self.disallowed_inside_substitution_definitions(node):
                 pformat = nodes.literal_block('', node.pformat().rstrip())
                 msg = self.reporter.error(
@@ -2234,7 +2285,7 @@ class Body(RSTState):
 
     explicit.constructs = [
           (footnote,
-           re.compile(r"""
+           regexcache.compile(r"""
                       \.\.[ ]+          # explicit markup start
                       \[
                       (                 # footnote label:
@@ -2250,25 +2301,25 @@ class Body(RSTState):
                       ([ ]+|$)          # whitespace or end of line
                       """ % Inliner.simplename, re.VERBOSE | re.UNICODE)),
           (citation,
-           re.compile(r"""
+           regexcache.compile(r"""
                       \.\.[ ]+          # explicit markup start
                       \[(%s)\]          # citation label
                       ([ ]+|$)          # whitespace or end of line
                       """ % Inliner.simplename, re.VERBOSE | re.UNICODE)),
           (hyperlink_target,
-           re.compile(r"""
+           regexcache.compile(r"""
                       \.\.[ ]+          # explicit markup start
                       _                 # target indicator
                       (?![ ]|$)         # first char. not space or EOL
                       """, re.VERBOSE)),
           (substitution_def,
-           re.compile(r"""
+           regexcache.compile(r"""
                       \.\.[ ]+          # explicit markup start
                       \|                # substitution indicator
                       (?![ ]|$)         # first char. not space or EOL
                       """, re.VERBOSE)),
           (directive,
-           re.compile(r"""
+           regexcache.compile(r"""
                       \.\.[ ]+          # explicit markup start
                       (%s)              # directive name
                       [ ]?              # optional space
@@ -2606,8 +2657,8 @@ class SubstitutionDef(Body):
     """
 
     patterns = {
-          'embedded_directive': re.compile(r'(%s)::( +|$)'
-                                           % Inliner.simplename, re.UNICODE),
+          'embedded_directive': regexcache.compile(
+              r'(%s)::( +|$)' % Inliner.simplename, re.UNICODE),
           'text': r''}
     initial_transitions = ['embedded_directive', 'text']
 
@@ -2777,7 +2828,7 @@ class Text(RSTState):
         self.nested_parse(indented, input_offset=line_offset, node=definition)
         return definitionlistitem, blank_finish
 
-    classifier_delimiter = re.compile(' +: +')
+    classifier_delimiter = regexcache.compile(' +: +')
 
     def term(self, lines, lineno):
         """Return a definition_list's term and optional classifiers."""
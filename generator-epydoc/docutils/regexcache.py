@@ -0,0 +1,142 @@
+# Copyright: This module has been placed in the public domain.
+
+"""
+Compiling regular expressions, with the compiled code kept in a cache file.
+
+Docutils compiles a few hundred regular expressions before the first
+document is parsed.  In a short-lived process that only parses a few
+documents, parsing and compiling them is a large part of the run time.
+
+`compile()` works like ``re.compile()``.  If the environment variable
+``DOCUTILS_REGEX_CACHE`` names a file, the compiled code of every pattern is
+read from that file when it's there, and the patterns that had to be
+compiled are added to the file when the process exits.  The file is only
+used by the Python version that wrote it; any problem with it is ignored and
+the patterns are compiled as usual.
+"""
+
+__docformat__ = 'reStructuredText'
+
+import sys
+import os
+import re
+import atexit
+import marshal
+
+try:
+    import _sre
+    import sre_compile
+    import sre_parse
+    _sre.compile, _sre.MAGIC, _sre.CODESIZE, sre_compile._code
+except (ImportError, AttributeError):
+    _sre = None
+
+_compiled = {}
+"""Mapping of (pattern, flags) pairs to compiled regular expressions."""
+
+_code = None
+"""
+Mapping of (pattern, flags) pairs to the arguments of ``_sre.compile()``
+(except the pattern), read from the cache file; None until it is read.
+"""
+
+_new_code = {}
+"""Entries for `_code` made in this process, to be added to the file."""
+
+def _cache_path():
+    return os.environ.get('DOCUTILS_REGEX_CACHE')
+
+def _header():
+    return ('docutils regex cache 1', sys.version, _sre.MAGIC,
+            _sre.CODESIZE, sys.maxunicode)
+
+def compile(pattern, flags=0):
+    """
+    Return ``re.compile(pattern, flags)``.  Patterns compiled before are
+    returned again, without being limited to the size of the ``re`` module's
+    cache.
+    """
+    if not isinstance(pattern, basestring): # already compiled
+        return re.compile(pattern, flags)
+    key = (pattern, flags)
+    try:
+        return _compiled[key]
+    except KeyError:
+        pass
+    if _sre is None or not _cache_path():
+        compiled = re.compile(pattern, flags)
+    else:
+        compiled = _compile_with_cache(pattern, flags)
+    _compiled[key] = compiled
+    return compiled
+
+def _compile_with_cache(pattern, flags):
+    global _code
+    if _code is None:
+        _code = _read_cache()
+        atexit.register(_write_cache)
+    key = (pattern, flags)
+    try:
+        return _sre.compile(pattern, *_code[key])
+    except (KeyError, TypeError, RuntimeError):
+        pass
+    # Do what ``sre_compile.compile()`` does, keeping the code it makes:
+    try:
+        p = sre_parse.parse(pattern, flags)
+        if p.pattern.groups > 100:
+            return re.compile(pattern, flags)
+        code = sre_compile._code(p, flags)
+        groupindex = p.pattern.groupdict
+        indexgroup = [None] * p.pattern.groups
+        for k, i in groupindex.items():
+            indexgroup[i] = k
+        arguments = (flags | p.pattern.flags, code, p.pattern.groups - 1,
+                     groupindex, indexgroup)
+        compiled = _sre.compile(pattern, *arguments)
+    except (TypeError, AttributeError, RuntimeError):
+        return re.compile(pattern, flags)
+    _new_code[key] = _code[key] = arguments
+    return compiled
+
+def _read_cache():
+    try:
+        f = open(_cache_path(), 'rb')
+        try:
+            header, code = marshal.load(f)
+        finally:
+            f.close()
+        if header == _header():
+            return code
+    except Exception:
+        pass
+    return {}
+
+def _write_cache():
+    if not _new_code:
+        return
+    path = _cache_path()
+    if not path:
+        return
+    # Another process may have added patterns in the meantime.
+    code = _read_cache()
+    code.update(_new_code)
+    temporary = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        f = open(temporary, 'wb')
+        try:
+            marshal.dump((_header(), code), f)
+        finally:
+            f.close()
+        try:
+            os.rename(temporary, path)
+        except OSError:
+            # Windows won't rename over an existing file.
+            os.remove(path)
+            os.rename(temporary, path)
+    except (IOError, OSError, ValueError):
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        return
+    _new_code.clear()
@@ -108,8 +108,11 @@ __docformat__ = 'restructuredtext'
 
 import sys
 import re
+import sre_constants
+import sre_parse
 import types
 import unicodedata
+from docutils import regexcache
 
 
 class StateMachine:
@@ -437,12 +440,17 @@ class StateMachine:
         """
         if transitions is None:
             transitions =  state.transition_order
+            # Only try the transitions whose patterns can match a line
+            # starting with this line's first character:
+            candidates = state.transition_candidates(self.line[:1])
+        else:
+            candidates = transitions
         state_correction = None
         if self.debug:
             print >>sys.stderr, (
                   '\nStateMachine.check_line: state="%s", transitions=%r.'
                   % (state.__class__.__name__, transitions))
-        for name in transitions:
+        for name in candidates:
             pattern, method, next_state = state.transitions[name]
             match = pattern.match(self.line)
             if match:
@@ -611,6 +619,15 @@ class State:
         or other classes.
         """
 
+        self.transition_dispatch = None
+        """
+        A mapping of first characters of input lines to the transition names
+        (in search order) whose patterns can match such a line, with the key
+        ``None`` for the transitions to try for any other line.  Built by
+        `transition_candidates()` when first needed, and discarded when the
+        transitions change.
+        """
+
         self.add_initial_transitions()
 
         self.state_machine = state_machine
@@ -643,6 +660,23 @@ class State:
                   self.initial_transitions)
             self.add_transitions(names, transitions)
 
+    def transition_candidates(self, first):
+        """
+        Return the names of the transitions, in search order, whose patterns
+        may match a line starting with the character `first` (an empty
+        string for an empty line).  The other transitions in
+        `self.transition_order` cannot match such a line.
+        """
+        dispatch = self.transition_dispatch
+        if dispatch is None:
+            dispatch = self.transition_dispatch = make_transition_dispatch(
+                [(name, self.transitions[name][0])
+                 for name in self.transition_order])
+        try:
+            return dispatch[first]
+        except KeyError:
+            return dispatch[None]
+
     def add_transitions(self, names, transitions):
         """
         Add a list of transitions to the start of the transition list.
@@ -661,6 +695,7 @@ class State:
                 raise UnknownTransitionError(name)
         self.transition_order[:0] = names
         self.transitions.update(transitions)
+        self.transition_dispatch = None
 
     def add_transition(self, name, transition):
         """
@@ -674,6 +709,7 @@ class State:
             raise DuplicateTransitionError(name)
         self.transition_order[:0] = [name]
         self.transitions[name] = transition
+        self.transition_dispatch = None
 
     def remove_transition(self, name):
         """
@@ -686,6 +722,7 @@ class State:
             self.transition_order.remove(name)
         except:
             raise UnknownTransitionError(name)
+        self.transition_dispatch = None
 
     def make_transition(self, name, next_state=None):
         """
@@ -709,7 +746,7 @@ class State:
         try:
             pattern = self.patterns[name]
             if not hasattr(pattern, 'match'):
-                pattern = re.compile(pattern)
+                pattern = regexcache.compile(pattern)
         except KeyError:
             raise TransitionPatternNotFound(
                   '%s.patterns[%r]' % (self.__class__.__name__, name))
@@ -1064,7 +1101,7 @@ class SearchStateMachineWS(_SearchOverride, StateMachineWS):
     pass
 
 
-class ViewList:
+class ViewList(object):
 
     """
     List with extended functionality: slices of ViewList objects are child
@@ -1082,17 +1119,33 @@ class ViewList:
     Also, ViewList objects keep track of the source & offset of each item.
     This information is accessible via the `source()`, `offset()`, and
     `info()` methods.
+
+    Slices don't copy their lines: a child list is a window (offset & length)
+    on its parent's storage, which is copied only when either list is
+    modified ("copy-on-write").  Taking nested blocks of nested blocks (as
+    the reStructuredText parser does) costs the same at every depth.
     """
 
     def __init__(self, initlist=None, source=None, items=None,
                  parent=None, parent_offset=None):
-        self.data = []
-        """The actual list of data, flattened from various sources."""
+        self._data = []
+        """Storage for `data`; `self._data_offset` is the index of item 0."""
+
+        self._items = []
+        """Storage for `items`; `self._items_offset` is the index of item 0."""
+
+        self._data_offset = self._items_offset = 0
+
+        self._length = None
+        """Number of items in a window on shared storage.  If None, the list
+        owns `self._data` & `self._items`, which hold exactly its items."""
+
+        self._shared = 0
+        """Has the storage of this list been shared with another list?"""
 
-        self.items = []
-        """A list of (source, offset) pairs, same length as `self.data`: the
-        source of each line and the offset of each line from the beginning of
-        its source."""
+        self._exposed = 0
+        """Have `data` or `items` been handed out?  Then they are updated in
+        place and never shared."""
 
         self.parent = parent
         """The parent list."""
@@ -1101,39 +1154,121 @@ class ViewList:
         """Offset of this list from the beginning of the parent list."""
 
         if isinstance(initlist, ViewList):
-            self.data = initlist.data[:]
-            self.items = initlist.items[:]
+            initlist._share_with(self, 0, len(initlist))
         elif initlist is not None:
-            self.data = list(initlist)
+            self._data = list(initlist)
             if items:
-                self.items = items
+                self._items = items
             else:
-                self.items = [(source, i) for i in range(len(initlist))]
-        assert len(self.data) == len(self.items), 'data mismatch'
+                self._items = [(source, i) for i in range(len(initlist))]
+            assert len(self._data) == len(self._items), 'data mismatch'
+
+    def _get_data(self):
+        self._own()
+        self._exposed = 1
+        return self._data
+
+    def _set_data(self, data):
+        self._own()
+        self._exposed = 1
+        self._data = data
+
+    data = property(_get_data, _set_data, doc="""
+        The actual list of data, flattened from various sources.""")
+
+    def _get_items(self):
+        self._own()
+        self._exposed = 1
+        return self._items
+
+    def _set_items(self, items):
+        self._own()
+        self._exposed = 1
+        self._items = items
+
+    items = property(_get_items, _set_items, doc="""
+        A list of (source, offset) pairs, same length as `self.data`: the
+        source of each line and the offset of each line from the beginning
+        of its source.""")
+
+    def _lines(self):
+        """Return the data as a list, which must not be modified."""
+        if self._length is None:
+            return self._data
+        return self._data[self._data_offset:
+                          self._data_offset + self._length]
+
+    def _infos(self):
+        """Return the items as a list, which must not be modified."""
+        if self._length is None:
+            return self._items
+        return self._items[self._items_offset:
+                           self._items_offset + self._length]
+
+    def _own(self):
+        """
+        Make the storage private to this list, so it can be modified in
+        place.
+        """
+        if self._length is not None:
+            self._data = self._lines()
+            self._items = self._infos()
+            self._data_offset = self._items_offset = 0
+            self._length = None
+        elif self._shared:
+            self._data = self._data[:]
+            self._items = self._items[:]
+        self._shared = 0
+
+    def _share_with(self, other, start, stop):
+        """
+        Make `other` a window on items `start` to `stop` of this list.
+        """
+        if self._exposed:
+            other._data = self._data[start:stop]
+            other._items = self._items[start:stop]
+            return
+        other._data = self._data
+        other._items = self._items
+        other._data_offset = self._data_offset + start
+        other._items_offset = self._items_offset + start
+        other._length = stop - start
+        other._shared = self._shared = 1
 
     def __str__(self):
-        return str(self.data)
+        return str(self._lines())
 
     def __repr__(self):
         return '%s(%s, items=%s)' % (self.__class__.__name__,
-                                     self.data, self.items)
+                                     self._lines(), self._infos())
 
-    def __lt__(self, other): return self.data <  self.__cast(other)
-    def __le__(self, other): return self.data <= self.__cast(other)
-    def __eq__(self, other): return self.data == self.__cast(other)
-    def __ne__(self, other): return self.data != self.__cast(other)
-    def __gt__(self, other): return self.data >  self.__cast(other)
-    def __ge__(self, other): return self.data >= self.__cast(other)
-    def __cmp__(self, other): return cmp(self.data, self.__cast(other))
+    def __lt__(self, other): return self._lines() <  self.__cast(other)
+    def __le__(self, other): return self._lines() <= self.__cast(other)
+    def __eq__(self, other): return self._lines() == self.__cast(other)
+    def __ne__(self, other): return self._lines() != self.__cast(other)
+    def __gt__(self, other): return self._lines() >  self.__cast(other)
+    def __ge__(self, other): return self._lines() >= self.__cast(other)
+    def __cmp__(self, other): return cmp(self._lines(), self.__cast(other))
 
     def __cast(self, other):
         if isinstance(other, ViewList):
-            return other.data
+            return other._lines()
         else:
             return other
 
-    def __contains__(self, item): return item in self.data
-    def __len__(self): return len(self.data)
+    def __contains__(self, item): return item in self._lines()
+
+    def __len__(self):
+        if self._length is None:
+            return len(self._data)
+        return self._length
+
+    # Simple slices (``l[i:j]``) adjust negative and missing indices before
+    # they are passed on, as they always did for this class.
+
+    def __getslice__(self, i, j): return self.__getitem__(slice(i, j))
+    def __setslice__(self, i, j, item): self.__setitem__(slice(i, j), item)
+    def __delslice__(self, i, j): self.__delitem__(slice(i, j))
 
     # The __getitem__()/__setitem__() methods check whether the index
     # is a slice first, since indexing a native list with a slice object
@@ -1142,126 +1277,147 @@ class ViewList:
     def __getitem__(self, i):
         if isinstance(i, types.SliceType):
             assert i.step in (None, 1),  'cannot handle slice with stride'
-            return self.__class__(self.data[i.start:i.stop],
-                                  items=self.items[i.start:i.stop],
-                                  parent=self, parent_offset=i.start or 0)
+            start, stop, step = i.indices(len(self))
+            child = self.__class__(parent=self, parent_offset=i.start or 0)
+            self._share_with(child, start, max(start, stop))
+            return child
+        elif self._length is None:
+            return self._data[i]
         else:
-            return self.data[i]
+            if i < 0:
+                i += self._length
+            if 0 <= i < self._length:
+                return self._data[self._data_offset + i]
+            raise IndexError('list index out of range')
 
     def __setitem__(self, i, item):
+        self._own()
         if isinstance(i, types.SliceType):
             assert i.step in (None, 1), 'cannot handle slice with stride'
             if not isinstance(item, ViewList):
                 raise TypeError('assigning non-ViewList to ViewList slice')
-            self.data[i.start:i.stop] = item.data
-            self.items[i.start:i.stop] = item.items
-            assert len(self.data) == len(self.items), 'data mismatch'
+            self._data[i.start:i.stop] = item._lines()
+            self._items[i.start:i.stop] = item._infos()
+            assert len(self._data) == len(self._items), 'data mismatch'
             if self.parent:
                 self.parent[(i.start or 0) + self.parent_offset
                             : (i.stop or len(self)) + self.parent_offset] = item
         else:
-            self.data[i] = item
+            self._data[i] = item
             if self.parent:
                 self.parent[i + self.parent_offset] = item
 
     def __delitem__(self, i):
+        self._own()
         try:
-            del self.data[i]
-            del self.items[i]
+            del self._data[i]
+            del self._items[i]
             if self.parent:
                 del self.parent[i + self.parent_offset]
         except TypeError:
             assert i.step is None, 'cannot handle slice with stride'
-            del self.data[i.start:i.stop]
-            del self.items[i.start:i.stop]
+            del self._data[i.start:i.stop]
+            del self._items[i.start:i.stop]
             if self.parent:
                 del self.parent[(i.start or 0) + self.parent_offset
                                 : (i.stop or len(self)) + self.parent_offset]
 
     def __add__(self, other):
         if isinstance(other, ViewList):
-            return self.__class__(self.data + other.data,
-                                  items=(self.items + other.items))
+            return self.__class__(self._lines() + other._lines(),
+                                  items=(self._infos() + other._infos()))
         else:
             raise TypeError('adding non-ViewList to a ViewList')
 
     def __radd__(self, other):
         if isinstance(other, ViewList):
-            return self.__class__(other.data + self.data,
-                                  items=(other.items + self.items))
+            return self.__class__(other._lines() + self._lines(),
+                                  items=(other._infos() + self._infos()))
         else:
             raise TypeError('adding ViewList to a non-ViewList')
 
     def __iadd__(self, other):
         if isinstance(other, ViewList):
-            self.data += other.data
+            self._own()
+            self._data += other._lines()
         else:
             raise TypeError('argument to += must be a ViewList')
         return self
 
     def __mul__(self, n):
-        return self.__class__(self.data * n, items=(self.items * n))
+        return self.__class__(self._lines() * n, items=(self._infos() * n))
 
     __rmul__ = __mul__
 
     def __imul__(self, n):
-        self.data *= n
-        self.items *= n
+        self._own()
+        self._data *= n
+        self._items *= n
         return self
 
     def extend(self, other):
         if not isinstance(other, ViewList):
             raise TypeError('extending a ViewList with a non-ViewList')
         if self.parent:
-            self.parent.insert(len(self.data) + self.parent_offset, other)
-        self.data.extend(other.data)
-        self.items.extend(other.items)
+            self.parent.insert(len(self) + self.parent_offset, other)
+        self._own()
+        self._data.extend(other._lines())
+        self._items.extend(other._infos())
 
     def append(self, item, source=None, offset=0):
         if source is None:
             self.extend(item)
         else:
             if self.parent:
-                self.parent.insert(len(self.data) + self.parent_offset, item,
+                self.parent.insert(len(self) + self.parent_offset, item,
                                    source, offset)
-            self.data.append(item)
-            self.items.append((source, offset))
+            self._own()
+            self._data.append(item)
+            self._items.append((source, offset))
 
     def insert(self, i, item, source=None, offset=0):
+        self._own()
         if source is None:
             if not isinstance(item, ViewList):
                 raise TypeError('inserting non-ViewList with no source given')
-            self.data[i:i] = item.data
-            self.items[i:i] = item.items
+            self._data[i:i] = item._lines()
+            self._items[i:i] = item._infos()
             if self.parent:
-                index = (len(self.data) + i) % len(self.data)
+                index = (len(self._data) + i) % len(self._data)
                 self.parent.insert(index + self.parent_offset, item)
         else:
-            self.data.insert(i, item)
-            self.items.insert(i, (source, offset))
+            self._data.insert(i, item)
+            self._items.insert(i, (source, offset))
             if self.parent:
-                index = (len(self.data) + i) % len(self.data)
+                index = (len(self._data) + i) % len(self._data)
                 self.parent.insert(index + self.parent_offset, item,
                                    source, offset)
 
     def pop(self, i=-1):
         if self.parent:
-            index = (len(self.data) + i) % len(self.data)
+            index = (len(self) + i) % len(self)
             self.parent.pop(index + self.parent_offset)
-        self.items.pop(i)
-        return self.data.pop(i)
+        self._own()
+        self._items.pop(i)
+        return self._data.pop(i)
 
     def trim_start(self, n=1):
         """
         Remove items from the start of the list, without touching the parent.
         """
-        if n > len(self.data):
+        length = len(self)
+        if n > length:
             raise IndexError("Size of trim too large; can't trim %s items "
-                             "from a list of size %s." % (n, len(self.data)))
+                             "from a list of size %s." % (n, length))
         elif n < 0:
             raise IndexError('Trim size must be >= 0.')
-        del self.data[:n]
-        del self.items[:n]
+        if self._exposed:
+            del self._data[:n]
+            del self._items[:n]
+        else:
+            self._data_offset += n
+            self._items_offset += n
+            self._length = length - n
         if self.parent:
             self.parent_offset += n
 
@@ -1269,40 +1425,55 @@ class ViewList:
         """
         Remove items from the end of the list, without touching the parent.
         """
-        if n > len(self.data):
+        length = len(self)
+        if n > length:
             raise IndexError("Size of trim too large; can't trim %s items "
-                             "from a list of size %s." % (n, len(self.data)))
+                             "from a list of size %s." % (n, length))
         elif n < 0:
             raise IndexError('Trim size must be >= 0.')
-        del self.data[-n:]
-        del self.items[-n:]
+        if self._exposed:
+            del self._data[-n:]
+            del self._items[-n:]
+        elif n:
+            self._length = length - n
+        else:
+            self._length = 0            # as ``del data[-0:]`` would do
 
     def remove(self, item):
         index = self.index(item)
         del self[index]
 
-    def count(self, item): return self.data.count(item)
-    def index(self, item): return self.data.index(item)
+    def count(self, item): return self._lines().count(item)
+    def index(self, item): return self._lines().index(item)
 
     def reverse(self):
-        self.data.reverse()
-        self.items.reverse()
+        self._own()
+        self._data.reverse()
+        self._items.reverse()
         self.parent = None
 
     def sort(self, *args):
-        tmp = zip(self.data, self.items)
+        tmp = zip(self._lines(), self._infos())
         tmp.sort(*args)
-        self.data = [entry[0] for entry in tmp]
-        self.items = [entry[1] for entry in tmp]
+        self._own()
+        self._data = [entry[0] for entry in tmp]
+        self._items = [entry[1] for entry in tmp]
         self.parent = None
 
     def info(self, i):
         """Return source & offset for index `i`."""
+        length = len(self)
+        if self._length is None:
+            index = i
+        elif -length <= i < length:
+            index = self._items_offset + (i % length)
+        else:
+            index = len(self._items)    # out of range
         try:
-            return self.items[i]
+            return self._items[index]
         except IndexError:
-            if i == len(self.data):     # Just past the end
-                return self.items[i - 1][0], None
+            if i == length:             # Just past the end
+                return self.info(i - 1)[0], None
             else:
                 raise
 
@@ -1320,7 +1491,7 @@ class ViewList:
 
     def xitems(self):
         """Return iterator yielding (source, offset, value) tuples."""
-        for (value, (source, offset)) in zip(self.data, self.items):
+        for (value, (source, offset)) in zip(self._lines(), self._infos()):
             yield (source, offset, value)
 
     def pprint(self):
@@ -1339,8 +1510,15 @@ class StringList(ViewList):
         from index `start` to `end`.  No whitespace-checking is done on the
         trimmed text.  Does not affect slice parent.
         """
-        self.data[start:end] = [line[length:]
-                                for line in self.data[start:end]]
+        if self._length is not None and not start and end >= self._length:
+            # Trimming a whole window: the new lines are private anyway, and
+            # the items can stay shared.
+            self._data = [line[length:] for line in self._lines()]
+            self._data_offset = 0
+            return
+        self._own()
+        self._data[start:end] = [line[length:]
+                                 for line in self._data[start:end]]
 
     def get_text_block(self, start, flush_left=0):
         """
@@ -1350,10 +1528,12 @@ class StringList(ViewList):
         indented line is encountered before the text block ends (with a blank
         line).
         """
+        data = self._data
+        base = self._data_offset
         end = start
-        last = len(self.data)
+        last = len(self)
         while end < last:
-            line = self.data[end]
+            line = data[base + end]
             if not line.strip():
                 break
             if flush_left and (line[0] == ' '):
@@ -1385,22 +1565,24 @@ class StringList(ViewList):
           - the amount of the indent;
           - a boolean: did the indented block finish with a blank line or EOF?
         """
+        data = self._data
+        base = self._data_offset
         indent = block_indent           # start with None if unknown
         end = start
         if block_indent is not None and first_indent is None:
             first_indent = block_indent
         if first_indent is not None:
             end += 1
-        last = len(self.data)
+        last = len(self)
         while end < last:
-            line = self.data[end]
+            line = data[base + end]
             if line and (line[0] != ' '
                          or (block_indent is not None
                              and line[:block_indent].strip())):
                 # Line not indented or insufficiently indented.
                 # Block finished properly iff the last indented line blank:
                 blank_finish = ((end > start)
-                                and not self.data[end - 1].strip())
+                                and not data[base + end - 1].strip())
                 break
             stripped = line.lstrip()
             if not stripped:            # blank line
@@ -1417,21 +1599,27 @@ class StringList(ViewList):
         else:
             blank_finish = 1            # block ends at end of lines
         block = self[start:end]
-        if first_indent is not None and block:
-            block.data[0] = block.data[0][first_indent:]
         if indent and strip_indent:
-            block.trim_left(indent, start=(first_indent is not None))
+            block.trim_left(indent)
+            if first_indent is not None and block:
+                # Undo the trim of the first line, which has its own indent.
+                block._data[0] = data[base + start][first_indent:]
+        elif first_indent is not None and block:
+            block._own()
+            block._data[0] = block._data[0][first_indent:]
         return block, indent or 0, blank_finish
 
     def get_2D_block(self, top, left, bottom, right, strip_indent=1):
         block = self[top:bottom]
+        block._own()
+        lines = block._data
         indent = right
-        for i in range(len(block.data)):
-            block.data[i] = line = block.data[i][left:right].rstrip()
+        for i in range(len(lines)):
+            lines[i] = line = lines[i][left:right].rstrip()
             if line:
                 indent = min(indent, len(line) - len(line.lstrip()))
         if strip_indent and 0 < indent < right:
-            block.data = [line[indent:] for line in block.data]
+            block._data = [line[indent:] for line in lines]
         return block
 
     def pad_double_width(self, pad_char):
@@ -1443,20 +1631,24 @@ class StringList(ViewList):
             east_asian_width = unicodedata.east_asian_width
         else:
             return                      # new in Python 2.4
-        for i in range(len(self.data)):
-            line = self.data[i]
+        self._own()
+        data = self._data
+        for i in range(len(data)):
+            line = data[i]
             if isinstance(line, unicode):
                 new = []
                 for char in line:
                     new.append(char)
                     if east_asian_width(char) in 'WF': # 'W'ide & 'F'ull-width
                         new.append(pad_char)
-                self.data[i] = ''.join(new)
+                data[i] = ''.join(new)
 
     def replace(self, old, new):
         """Replace all occurrences of substring `old` with `new`."""
-        for i in range(len(self.data)):
-            self.data[i] = self.data[i].replace(old, new)
+        self._own()
+        data = self._data
+        for i in range(len(data)):
+            data[i] = data[i].replace(old, new)
 
 
 class StateMachineError(Exception): pass
@@ -1507,6 +1699,123 @@ def string2lines(astring, tab_width=8, convert_whitespace=0,
         astring = whitespace.sub(' ', astring)
     return [s.expandtabs(tab_width).rstrip() for s in astring.splitlines()]
 
+_transition_dispatches = {}
+"""Transition dispatch mappings built by `make_transition_dispatch()`."""
+
+def make_transition_dispatch(transitions):
+    """
+    Return a mapping of line first characters to the names of the
+    transitions that may match a line starting with that character (see
+    `State.transition_dispatch`).
+
+    Parameter `transitions`: a list of (transition name, compiled pattern)
+    pairs, in search order.
+    """
+    key = tuple(transitions)
+    try:
+        return _transition_dispatches[key]
+    except KeyError:
+        pass
+    firsts = [(name, pattern_first_characters(pattern))
+              for name, pattern in transitions]
+    characters = {}
+    for name, first in firsts:
+        if first is not None:
+            characters.update(first)
+    dispatch = {None: [name for name, first in firsts if first is None]}
+    for char in characters:
+        dispatch[char] = [name for name, first in firsts
+                          if first is None or char in first]
+    _transition_dispatches[key] = dispatch
+    return dispatch
+
+_first_characters = {}
+"""Cached results of `pattern_first_characters()`."""
+
+def pattern_first_characters(pattern):
+    """
+    Return a dictionary whose keys are the first characters of the strings
+    that the compiled regular expression `pattern` can match (with its
+    ``match()`` method), or ``None`` if they can't be worked out.  An empty
+    string key stands for the end of the string: the pattern may match an
+    empty string.
+    """
+    try:
+        return _first_characters[pattern]
+    except KeyError:
+        pass
+    first = None
+    if not pattern.flags & (re.IGNORECASE | re.LOCALE):
+        try:
+            first, nullable = _first_characters_of(
+                sre_parse.parse(pattern.pattern, pattern.flags))
+            if nullable:
+                first = None
+        except (_UnknownFirstCharacters, ValueError):
+            pass
+    _first_characters[pattern] = first
+    return first
+
+class _UnknownFirstCharacters(Exception): pass
+
+def _first_characters_of(subpattern):
+    """
+    Return a dictionary whose keys are the first characters that the parsed
+    (``sre_parse``) regular expression `subpattern` can match, and whether it
+    can match without consuming a character.
+
+    Exception: `_UnknownFirstCharacters` if they can't be worked out.
+    """
+    first = {}
+    for op, av in subpattern:
+        if op == sre_constants.LITERAL:
+            first[unichr(av)] = None
+            return first, False
+        elif op == sre_constants.IN:
+            for item_op, item_av in av:
+                if item_op == sre_constants.LITERAL:
+                    first[unichr(item_av)] = None
+                elif (item_op == sre_constants.RANGE
+                      and item_av[1] - item_av[0] < 256):
+                    for code in range(item_av[0], item_av[1] + 1):
+                        first[unichr(code)] = None
+                else:
+                    raise _UnknownFirstCharacters
+            return first, False
+        elif op == sre_constants.AT:
+            if av == sre_constants.AT_BEGINNING:
+                continue
+            elif av == sre_constants.AT_END:
+                # At the start of a line, "$" needs the end of the line
+                # (or a trailing newline):
+                first[''] = first['\n'] = None
+                return first, False
+            raise _UnknownFirstCharacters
+        elif op == sre_constants.SUBPATTERN:
+            sub_first, nullable = _first_characters_of(av[-1])
+        elif op == sre_constants.BRANCH:
+            nullable = False
+            sub_first = {}
+            for branch in av[1]:
+                branch_first, branch_nullable = _first_characters_of(branch)
+                sub_first.update(branch_first)
+                nullable = nullable or branch_nullable
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            minimum, maximum, item = av
+            if maximum == 0:
+                continue
+            sub_first, nullable = _first_characters_of(item)
+            nullable = nullable or minimum == 0
+        elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            # Lookahead & lookbehind assertions only rule out matches.
+            continue
+        else:
+            raise _UnknownFirstCharacters
+        first.update(sub_first)
+        if not nullable:
+            return first, False
+    return first, True
+
 def _exception_data():
     """
     Return exception information:
@@ -39,6 +39,12 @@ class Transform:
     default_priority = None
     """Numerical priority of this transform, 0 through 999 (override)."""
 
+    required_nodes = None
+    """Tuple of the node classes this transform works on, if it does nothing
+    to documents without them (override).  The transform isn't applied to a
+    document which certainly has none; see `nodes.document.may_contain()`.
+    Transforms with a pending node are always applied."""
+
     def __init__(self, document, startnode=None):
         """
         Initial setup for in-place document transforms.
@@ -167,6 +173,10 @@ class Transformer(TransformSpec):
                 self.transforms.reverse()
                 self.sorted = 1
             priority, transform_class, pending, kwargs = self.transforms.pop()
+            if (pending is None and transform_class.required_nodes
+                and not self.document.may_contain(
+                    transform_class.required_nodes)):
+                continue
             transform = transform_class(self.document, startnode=pending)
             transform.apply(**kwargs)
             self.applied.append((priority, transform_class, pending, kwargs))
@@ -257,6 +257,7 @@ class SectionSubTitle(TitlePromoter):
     """
 
     default_priority = 350
+    required_nodes = (nodes.section,)
 
     def apply(self):
         if not getattr(self.document.settings, 'sectsubtitle_xform', 1):
@@ -346,6 +347,7 @@ class DocInfo(Transform):
     """
 
     default_priority = 340
+    required_nodes = (nodes.field_list,)
 
     biblio_nodes = {
           'author': nodes.author,
@@ -92,6 +92,7 @@ class Transitions(Transform):
     """
 
     default_priority = 830
+    required_nodes = (nodes.transition,)
 
     def apply(self):
         for node in self.document.traverse(nodes.transition):
@@ -38,6 +38,7 @@ class PropagateTargets(Transform):
     """
 
     default_priority = 260
+    required_nodes = (nodes.target,)
 
     def apply(self):
         for target in self.document.traverse(nodes.target):
@@ -110,6 +111,7 @@ class AnonymousHyperlinks(Transform):
     """
 
     default_priority = 440
+    required_nodes = (nodes.reference, nodes.target)
 
     def apply(self):
         anonymous_refs = []
@@ -204,6 +206,7 @@ class IndirectHyperlinks(Transform):
     """
 
     default_priority = 460
+    required_nodes = (nodes.target,)
 
     def apply(self):
         for target in self.document.indirect_targets:
@@ -347,6 +350,7 @@ class ExternalTargets(Transform):
     """
 
     default_priority = 640
+    required_nodes = (nodes.target,)
 
     def apply(self):
         for target in self.document.traverse(nodes.target):
@@ -367,6 +371,7 @@ class ExternalTargets(Transform):
 class InternalTargets(Transform):
 
     default_priority = 660
+    required_nodes = (nodes.target,)
 
     def apply(self):
         for target in self.document.traverse(nodes.target):
@@ -465,6 +470,8 @@ class Footnotes(Transform):
     """
 
     default_priority = 620
+    required_nodes = (nodes.footnote, nodes.footnote_reference,
+                      nodes.citation, nodes.citation_reference)
 
     autofootnote_labels = None
     """Keep track of unlabeled autonumbered footnotes."""
@@ -658,6 +665,8 @@ class Substitutions(Transform):
     """The Substitutions transform has to be applied very early, before
     `docutils.tranforms.frontmatter.DocTitle` and others."""
 
+    required_nodes = (nodes.substitution_reference,)
+
     def apply(self):
         defs = self.document.substitution_defs
         normed = self.document.substitution_names
@@ -832,6 +841,8 @@ class DanglingReferences(Transform):
     """
 
     default_priority = 850
+    required_nodes = (nodes.reference, nodes.footnote_reference,
+                      nodes.citation_reference, nodes.target)
 
     def apply(self):
         visitor = DanglingReferencesVisitor(
@@ -92,7 +92,7 @@ class ExposeInternals(Transform):
 
     def apply(self):
         if self.document.settings.expose_internals:
-            for node in self.document.traverse(self.not_Text):
+            for node in self.document.iter_traverse(self.not_Text):
                 for att in self.document.settings.expose_internals:
                     value = getattr(node, att, None)
                     if value is not None:
@@ -131,6 +131,7 @@ class FilterMessages(Transform):
     """
 
     default_priority = 870
+    required_nodes = (nodes.system_message,)
 
     def apply(self):
         for node in self.document.traverse(nodes.system_message):
@@ -162,6 +163,7 @@ class StripComments(Transform):
     """
 
     default_priority = 740
+    required_nodes = (nodes.comment,)
 
     def apply(self):
         if self.document.settings.strip_comments:
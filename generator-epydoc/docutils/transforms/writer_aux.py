@@ -36,6 +36,7 @@ class Compound(Transform):
     """
 
     default_priority = 910
+    required_nodes = (nodes.compound,)
 
     def apply(self):
         for compound in self.document.traverse(nodes.compound):
@@ -71,6 +72,7 @@ class Admonitions(Transform):
     """
 
     default_priority = 920
+    required_nodes = (nodes.Admonition,)
 
     def apply(self):
         lcode = self.document.settings.language_code
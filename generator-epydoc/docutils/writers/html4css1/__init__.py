@@ -181,6 +181,37 @@ class Writer(writers.Writer):
             self.parts[part] = ''.join(getattr(self, part))
 
 
+special_characters = {
+    ord('&'): u'&amp;',
+    ord('<'): u'&lt;',
+    ord('"'): u'&quot;',
+    ord('>'): u'&gt;',
+    ord('@'): u'&#64;', # may thwart some address harvesters
+    # TODO: convert non-breaking space only if needed?
+    0xa0: u'&nbsp;'} # non-breaking space
+"""Mapping of the ordinals of the characters `HTMLTranslator.encode()`
+replaces to their replacements."""
+
+def _translation_table(mapping):
+    """
+    Return `mapping` (of ordinals below 256 to replacement strings) as a
+    table for ``unicode.translate()``: a list indexed by ordinal, which
+    translates much faster than a dictionary.  Characters beyond the table
+    are left alone.
+    """
+    table = [unichr(i) for i in range(256)]
+    for ordinal, replacement in mapping.items():
+        table[ordinal] = replacement
+    return table
+
+_encode_table = _translation_table(special_characters)
+
+_starttag_cache = {}
+"""Start tags without attributes other than "class", by translator class,
+tag name, suffix, emptiness, and classes.  See `HTMLTranslator.starttag()`.
+"""
+
+
 class HTMLTranslator(nodes.NodeVisitor):
 
     """
@@ -311,15 +342,7 @@ class HTMLTranslator(nodes.NodeVisitor):
     def encode(self, text):
         """Encode special characters in `text` & return."""
         # @@@ A codec to do these and all other HTML entities would be nice.
-        text = unicode(text)
-        return text.translate({
-            ord('&'): u'&amp;',
-            ord('<'): u'&lt;',
-            ord('"'): u'&quot;',
-            ord('>'): u'&gt;',
-            ord('@'): u'&#64;', # may thwart some address harvesters
-            # TODO: convert non-breaking space only if needed?
-            0xa0: u'&nbsp;'}) # non-breaking space
+        return unicode(text).translate(_encode_table)
 
     def cloak_mailto(self, uri):
         """Try to hide a mailto: URL from harvesters."""
@@ -352,6 +375,30 @@ class HTMLTranslator(nodes.NodeVisitor):
         are extracted), tag name, and optional attributes.
         """
         tagname = tagname.lower()
+        if (not attributes or attributes.keys() == ['class']) \
+               and not node.get('ids') and not self.in_mailto:
+            # Most tags have no attributes but classes: cache them.
+            classes = node.get('classes', [])
+            if attributes:
+                classes.append(attributes['class'])
+            key = (self.__class__, tagname, suffix, empty, tuple(classes))
+            try:
+                return _starttag_cache[key]
+            except KeyError:
+                pass
+            parts = [tagname]
+            if classes:
+                parts.append('class="%s"'
+                             % self.attval(unicode(' '.join(classes))))
+            if empty:
+                infix = ' /'
+            else:
+                infix = ''
+            tag = '<%s%s>' % (' '.join(parts), infix) + suffix
+            if len(_starttag_cache) > 1000:
+                _starttag_cache.clear()
+            _starttag_cache[key] = tag
+            return tag
         prefix = []
         atts = {}
         ids = []
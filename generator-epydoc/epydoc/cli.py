@@ -83,6 +83,7 @@ except:
     xlink = None
 
 INHERITANCE_STYLES = ('grouped', 'listed', 'included')
+SOURCECODE_PAGES = ('write', 'defer', 'only')
 GRAPH_TYPES = ('classtree', 'callgraph', 'umlclasstree')
 ACTIONS = ('html', 'text', 'latex', 'dvi', 'ps', 'pdf', 'check')
 DEFAULT_DOCFORMAT = 'epytext'
@@ -134,7 +135,9 @@ OPTION_DEFAULTS = dict(
     verbose=0, quiet=0, load_pickle=False, parse=True, introspect=True,
     debug=epydoc.DEBUG, profile=False, graphs=[],
     list_classes_separately=False, graph_font=None, graph_font_size=None,
-    include_source_code=True, pstat_files=[], simple_term=False, fail_on=None,
+    graph_cache=None, graph_jobs=1,
+    include_source_code=True, sourcecode_pages='write', pstat_files=[],
+    simple_term=False, fail_on=None,
     exclude=[], exclude_parse=[], exclude_introspect=[],
     external_api=[], external_api_file=[], external_api_root=[],
     redundant_details=False, src_code_tab_width=8)
@@ -153,7 +156,8 @@ def parse_arguments():
     optparser.add_option("--output", "-o",
         dest="target", metavar="PATH",
         help="The output directory.  If PATH does not exist, then "
-        "it will be created.")
+        "it will be created.  If PATH ends with '.zip', then the HTML "
+        "output is written to a zip archive instead.")
 
     optparser.add_option("--quiet", "-q",
         action="count", dest="quiet",
@@ -282,6 +286,15 @@ def parse_arguments():
         help=("Do not include source code with syntax highlighting in the "
               "HTML output."))
 
+    generation_group.add_option('--sourcecode-pages',
+        dest='sourcecode_pages', metavar='WHEN',
+        choices=SOURCECODE_PAGES,
+        help=("When to write the source code pages: 'write' (along with "
+              "the other pages; the default), 'defer' (link to them, but "
+              "do not write them), or 'only' (write only the source code "
+              "pages, e.g. for documentation whose pages were deferred "
+              "by an earlier run on the same pickle file)."))
+
     generation_group.add_option('--include-log',
         action='store_true', dest='include_log',
         help=("Include a page with the process log (epydoc-log.html)"))
@@ -371,6 +384,17 @@ def parse_arguments():
         dest="dotpath", metavar='PATH',
         help="The path to the Graphviz 'dot' executable.")
 
+    graph_group.add_option("--graph-cache",
+        dest="graph_cache", metavar='DIR',
+        help=("A directory where rendered graphs are cached, so graphs "
+              "that have not changed since a previous run are not "
+              "rendered again."))
+
+    graph_group.add_option("--graph-jobs",
+        dest="graph_jobs", metavar='N', type='int',
+        help=("The number of Graphviz dot processes that may run at "
+              "the same time (default: 1)."))
+
     graph_group.add_option('--graph-font',
         dest='graph_font', metavar='FONT',
         help=("Specify the font used to generate Graphviz graphs.  (e.g., "
@@ -556,6 +580,11 @@ def parse_configfiles(configfiles, options, names):
             options.show_imports = _str_to_bool(val, optname)
         elif optname == 'sourcecode':
             options.include_source_code = _str_to_bool(val, optname)
+        elif optname in ('sourcecode-pages', 'sourcecode_pages'):
+            if val.lower() not in SOURCECODE_PAGES:
+                raise ValueError('"%s" expected one of: %s.' %
+                                 (optname, ', '.join(SOURCECODE_PAGES)))
+            options.sourcecode_pages = val.lower()
         elif optname in ('include-log', 'include_log'):
             options.include_log = _str_to_bool(val, optname)
         elif optname in ('redundant-details', 'redundant_details'):
@@ -599,6 +628,10 @@ def parse_configfiles(configfiles, options, names):
             options.graphs.extend(graphtypes)
         elif optname == 'dotpath':
             options.dotpath = val
+        elif optname in ('graph-cache', 'graph_cache'):
+            options.graph_cache = val
+        elif optname in ('graph-jobs', 'graph_jobs'):
+            options.graph_jobs = _str_to_int(val, optname)
         elif optname in ('graph-font', 'graph_font'):
             options.graph_font = val
         elif optname in ('graph-font-size', 'graph_font_size'):
@@ -690,14 +723,18 @@ def main(options, names):
         log.register_logger(logger)
 
     # check the output directory.
-    if options.action not in ('text', 'check', 'pickle'):
+    if (options.action not in ('text', 'check', 'pickle') and
+        not (options.action == 'html' and options.target.endswith('.zip'))):
         if os.path.exists(options.target):
             if not os.path.isdir(options.target):
                 log.error("%s is not a directory" % options.target)
                 sys.exit(1)
 
     if options.include_log:
-        if options.action == 'html':
+        if options.action == 'html' and options.target.endswith('.zip'):
+            log.warning("--include-log is not supported when writing "
+                        "to a zip archive")
+        elif options.action == 'html':
             if not os.path.exists(options.target):
                 os.mkdir(options.target)
             log.register_logger(HTMLLogger(options.target, options))
@@ -721,6 +758,12 @@ def main(options, names):
         from epydoc.docwriter import dotgraph
         dotgraph.DOT_COMMAND = options.dotpath
 
+    # Set up the graph cache & rendering pool
+    if options.graph_cache or options.graph_jobs > 1:
+        from epydoc.docwriter import dotgraph
+        dotgraph.DOT_CACHE_DIR = options.graph_cache
+        dotgraph.DOT_JOBS = options.graph_jobs
+
     # Set the default graph font & size
     if options.graph_font:
         from epydoc.docwriter import dotgraph
@@ -71,7 +71,7 @@ import sys, os, os.path, __builtin__, imp, re, inspect
 from epydoc.apidoc import *
 from epydoc.docintrospecter import introspect_docs
 from epydoc.docparser import parse_docs, ParseError
-from epydoc.docstringparser import parse_docstring
+from epydoc.docstringparser import parse_docstring, PARSE_CACHE
 from epydoc import log
 from epydoc.util import *
 from epydoc.compat import * # Backwards compatibility
@@ -285,6 +285,8 @@ def build_doc_index(items, introspect=True, parse=True, add_submodules=True,
                     var_doc.value.defining_module = val_doc.defining_module
                 parse_docstring(var_doc, docindex, suppress_warnings)
     log.end_progress()
+    log.info('Docstring parse cache: %d hits, %d misses' %
+             (PARSE_CACHE.hits, PARSE_CACHE.misses))
 
     # Take care of inheritance.
     log.start_progress('Inheriting documentation')
@@ -30,6 +30,7 @@ __docformat__ = 'epytext en'
 ######################################################################
 
 import re, sys
+from collections import deque
 from epydoc import markup
 from epydoc.markup import epytext
 from epydoc.apidoc import *
@@ -167,6 +168,87 @@ DEFAULT_DOCFORMAT = 'epytext'
 # asked to process one twice?  e.g., for @include we might have to
 # parse the included docstring earlier than we might otherwise..??
 
+class DocstringParseCache:
+    """
+    A content-addressed cache of parsed docstrings.  Identical
+    docstrings (boilerplate, re-exported or duplicated members) are
+    parsed by the markup language only once; every C{APIDoc} that
+    uses the same docstring text shares the same description and
+    fields.  The parsed docstrings are never modified once they have
+    been split into fields, so sharing them is safe.
+
+    Entries are keyed by the docstring text, its markup language and
+    any extra parse options.  The markup errors encountered while
+    parsing are stored with the entry, and copies of them are handed
+    out on every hit, since L{report_errors()} adjusts their line
+    numbers in place.
+
+    @ivar max_entries: The maximum number of docstrings to keep in the
+        cache.  When the cache is full, the oldest entries are
+        discarded first.  If C{0}, then nothing is cached.
+    @ivar hits: The number of lookups that were served from the cache.
+    @ivar misses: The number of lookups that required a parse.
+    """
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._order = deque()
+
+    def parse(self, docstring, docformat, parse_errors, **options):
+        """
+        Parse C{docstring} with the markup language C{docformat}, and
+        split it into a description and a list of fields.
+
+        @param parse_errors: A list where any markup errors will be
+            stored.
+        @return: A tuple C{(descr, fields)}, as returned by
+            L{ParsedDocstring.split_fields()
+            <markup.ParsedDocstring.split_fields>}.  The C{fields}
+            list is a fresh copy, and may be modified by the caller.
+        """
+        key = (type(docstring), docstring, docformat,
+               tuple(sorted(options.items())))
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            errors = []
+            parsed_docstring = markup.parse(docstring, docformat, errors,
+                                            **options)
+            descr, fields = parsed_docstring.split_fields(errors)
+            entry = (descr, tuple(fields), tuple(errors))
+            if self.max_entries > 0:
+                self._entries[key] = entry
+                self._order.append(key)
+                while len(self._order) > self.max_entries:
+                    del self._entries[self._order.popleft()]
+        else:
+            self.hits += 1
+
+        descr, fields, errors = entry
+        parse_errors.extend([_copy_parse_error(error) for error in errors])
+        return descr, list(fields)
+
+    def clear(self):
+        """Discard all cached docstrings, and reset the counters."""
+        self._entries.clear()
+        self._order.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+PARSE_CACHE = DocstringParseCache()
+"""The L{DocstringParseCache} used by L{parse_docstring()}."""
+
+def _copy_parse_error(error):
+    # ParseError subclasses take different constructor arguments, so
+    # copy.copy() can't rebuild them; copy their attributes instead.
+    result = error.__class__.__new__(error.__class__)
+    result.__dict__.update(error.__dict__)
+    return result
+
 def parse_docstring(api_doc, docindex, suppress_warnings=[]):
     """
     Process the given C{APIDoc}'s docstring.  In particular, populate
@@ -210,14 +292,12 @@ def parse_docstring(api_doc, docindex, suppress_warnings=[]):
     if isinstance(api_doc, RoutineDoc):
         parse_function_signature(api_doc, None, docformat, parse_errors)
 
-    # Parse the docstring.  Any errors encountered are stored as
-    # `ParseError` objects in the errors list.
-    parsed_docstring = markup.parse(api_doc.docstring, docformat,
-                                    parse_errors)
-        
-    # Divide the docstring into a description and a list of
-    # fields.
-    descr, fields = parsed_docstring.split_fields(parse_errors)
+    # Parse the docstring, and divide it into a description and a
+    # list of fields.  Any errors encountered are stored as
+    # `ParseError` objects in the errors list.  Identical docstrings
+    # are only parsed once.
+    descr, fields = PARSE_CACHE.parse(api_doc.docstring, docformat,
+                                      parse_errors)
     api_doc.descr = descr
 
     field_warnings = []
@@ -22,6 +22,10 @@ __docformat__ = 'restructuredtext'
 
 import re
 import sys
+import os
+import shutil
+import tempfile
+from hashlib import sha1
 from epydoc import log
 from epydoc.apidoc import *
 from epydoc.util import *
@@ -43,6 +47,16 @@ INH_LINK_COLOR = '#800000'
 DOT_COMMAND = 'dot'
 """The command that should be used to spawn dot"""
 
+DOT_CACHE_DIR = None
+"""A directory where rendered graphs are kept between runs, or ``None``
+to disable the cache.  See `DotRenderer`."""
+
+DOT_JOBS = 1
+"""The maximum number of dot processes that may run at the same time.
+If greater than one, graphs are rendered in the background, and the
+pages that contain them must be passed through `DotRenderer.resolve()`
+once they have been written."""
+
 class DotGraph:
     """
     A ``dot`` directed graph.  The contents of the graph are
@@ -140,7 +154,7 @@ class DotGraph:
         # the cmapx with a single call to dot.  Otherwise, we need to
         # run dot twice.
         if get_dot_version() > [1,8,10]:
-            cmapx = self._run_dot('-Tgif', '-o%s' % image_file, '-Tcmapx')
+            cmapx = DOT_RENDERER.render(self, image_file)
             if cmapx is None: return '' # failed to render
         else:
             if not self.write(image_file):
@@ -186,7 +200,7 @@ class DotGraph:
                 s += '<span class="graph-caption">%s</span>' % caption
             s += '\n  </td></tr>\n</table><br />'
         if center: s += '</center>'
-        return s
+        return DOT_RENDERER.wrap_deferred(cmapx, s)
 
     def link(self, docstring_linker):
         """
@@ -242,10 +256,18 @@ class DotGraph:
         """
         return self._run_dot('-T%s' % language)
 
-    def _run_dot(self, *options):
+    def _run_dot(self, *options, **kwargs):
+        """
+        Run ``dot`` on this graph with the given command-line options,
+        and return its output, or ``None`` if it failed.  If the graph's
+        dot file has already been built, then it can be passed as the
+        ``dotfile`` keyword argument, so it isn't built again.
+        """
+        dotfile = kwargs.get('dotfile')
+        if dotfile is None:
+            dotfile = self.to_dotfile()
         try:
-            result, err = run_subprocess((DOT_COMMAND,)+options,
-                                         self.to_dotfile())
+            result, err = run_subprocess((DOT_COMMAND,)+options, dotfile)
             if err: log.warning("Graphviz dot warning(s):\n%s" % err)
         except OSError, e:
             log.warning("Unable to render Graphviz dot graph:\n%s" % e)
@@ -258,7 +280,14 @@ class DotGraph:
         """
         Return the string contents of the dot file that should be used
         to render this graph.
+
+        The nodes are renumbered from zero, in the order they appear in
+        `nodes`, so that the dot file does not depend on how many nodes
+        were created for earlier graphs (`DotRenderer` caches images by
+        the contents of the dot file).
         """
+        for (i, node) in enumerate(self.nodes):
+            node.id = i
         lines = ['digraph %s {' % self.uid,
                  'node [%s]' % ','.join(['%s="%s"' % (k,v) for (k,v)
                                          in self.node_defaults.items()]),
@@ -1055,7 +1084,7 @@ def class_tree_graph(bases, linker, context=None, **options):
         for subcls in cls.subclasses:
             if cls in nodes and subcls in nodes:
                 edges.add((nodes[cls], nodes[subcls]))
-    graph.edges = [DotGraphEdge(src,dst) for (src,dst) in edges]
+    graph.edges = [DotGraphEdge(src,dst) for (src,dst) in _sort_edges(edges)]
 
     return graph
 
@@ -1120,7 +1149,7 @@ def uml_class_tree_graph(class_doc, linker, context=None, **options):
         
     # Turn attributes into links.
     if options.get('link_attributes', True):
-        for node in nodes.values():
+        for node in _sort_nodes(nodes.values()):
             node.link_attributes(nodes)
             # Make sure that none of the new attribute edges break the
             # rank ordering assigned by inheritance.
@@ -1131,10 +1160,10 @@ def uml_class_tree_graph(class_doc, linker, context=None, **options):
     # Construct the graph.
     graph = DotGraph('UML class diagram for %s' % class_doc.canonical_name,
                      body='ranksep=.2\n;nodesep=.3\n')
-    graph.nodes = nodes.values()
+    graph.nodes = _sort_nodes(nodes.values())
     
     # Add inheritance edges.
-    for node in inheritance_nodes:
+    for node in _sort_nodes(inheritance_nodes):
         for base in node.class_doc.bases:
             if base in nodes:
                 graph.edges.append(DotGraphEdge(nodes[base], node,
@@ -1168,7 +1197,7 @@ def import_graph(modules, docindex, linker, context=None, **options):
                     if val_doc in nodes and dst in nodes:
                         edges.add((nodes[val_doc], nodes[dst]))
                     break
-    graph.edges = [DotGraphEdge(src,dst) for (src,dst) in edges]
+    graph.edges = [DotGraphEdge(src,dst) for (src,dst) in _sort_edges(edges)]
 
     return graph
 
@@ -1237,7 +1266,7 @@ def call_graph(api_docs, docindex, linker, context=None, **options):
         for callee in docindex.callees.get(func_doc, ()):
             if callee in nodes:
                 edges.add( (nodes[func_doc], nodes[callee]) )
-    graph.edges = [DotGraphEdge(src,dst) for (src,dst) in edges]
+    graph.edges = [DotGraphEdge(src,dst) for (src,dst) in _sort_edges(edges)]
     
     return graph
 
@@ -1263,6 +1292,181 @@ def get_dot_version():
         log.info('Detected dot version %s' % _dot_version)
     return _dot_version
 
+######################################################################
+#{ Graph Rendering
+######################################################################
+
+class DotRenderer:
+    """
+    Render graphs to an image file and a client-side image map.
+
+    If `DOT_CACHE_DIR` is set, then each rendered graph is stored there,
+    keyed by a hash of its dot source (and of the dot command and
+    version used to render it); a graph that has already been rendered
+    by an earlier run is copied from the cache instead of running dot.
+
+    If `DOT_JOBS` is greater than one, then graphs that are not in the
+    cache are rendered in the background, with at most `DOT_JOBS` dot
+    processes running at once.  In that case `render()` returns a
+    placeholder for the image map, and the HTML produced by
+    `DotGraph.to_html()` must be passed through `resolve()` to fill it
+    in (or to remove the graph, if rendering failed).
+    """
+    _DEFERRED_CMAPX_RE = re.compile(r'^<!--epydoc-cmapx:(\d+)-->$')
+    _DEFERRED_GRAPH_RE = re.compile(
+        r'<!--epydoc-graph:(\d+)-->(.*?)<!--/epydoc-graph:\1-->', re.DOTALL)
+
+    def __init__(self):
+        self.deferred = 0
+        """The number of graphs that have been deferred so far."""
+        self._running = []
+        """The background dot processes, as a list of tuples
+        ``(job, key, image_file, process, stdout, stderr)``."""
+        self._results = {}
+        """Maps each finished deferred job to its cmapx, or to ``None``
+        if rendering failed."""
+
+    def render(self, graph, image_file):
+        """
+        Render `graph` as a gif image in `image_file`.
+
+        :return: The graph's cmapx, as a utf-8 encoded string; or a
+            placeholder, if the graph is being rendered in the
+            background; or ``None``, if rendering failed.
+        """
+        dotfile = graph.to_dotfile()
+        key = sha1('%s\0%s\0%s' % (DOT_COMMAND, get_dot_version(),
+                                    dotfile)).hexdigest()
+
+        cmapx = self._cache_get(key, image_file)
+        if cmapx is not None:
+            return cmapx
+
+        if DOT_JOBS <= 1:
+            cmapx = graph._run_dot('-Tgif', '-o%s' % image_file, '-Tcmapx',
+                                   dotfile=dotfile)
+            if cmapx is not None:
+                self._cache_put(key, image_file, cmapx)
+            return cmapx
+
+        # Wait for a free slot, and start dot in the background.
+        while len(self._running) >= DOT_JOBS:
+            self._finish(self._running.pop(0))
+        stdin = tempfile.TemporaryFile()
+        stdin.write(dotfile)
+        stdin.seek(0)
+        stdout = tempfile.TemporaryFile()
+        stderr = tempfile.TemporaryFile()
+        try:
+            from subprocess import Popen
+            process = Popen([DOT_COMMAND, '-Tgif', '-o%s' % image_file,
+                             '-Tcmapx'], stdin=stdin, stdout=stdout,
+                            stderr=stderr)
+        except OSError, e:
+            log.warning("Unable to render Graphviz dot graph:\n%s" % e)
+            return None
+        finally:
+            stdin.close()
+
+        self.deferred += 1
+        job = self.deferred
+        self._running.append((job, key, image_file, process, stdout, stderr))
+        return '<!--epydoc-cmapx:%d-->' % job
+
+    def wrap_deferred(self, cmapx, html):
+        """
+        If `cmapx` is a placeholder returned by `render()`, then mark
+        up `html` (the graph's HTML code) so that `resolve()` can find
+        it.  Otherwise, return `html` unchanged.
+        """
+        m = self._DEFERRED_CMAPX_RE.match(cmapx.strip())
+        if m is None: return html
+        job = m.group(1)
+        return '<!--epydoc-graph:%s-->%s<!--/epydoc-graph:%s-->' % (
+            job, html, job)
+
+    def wait(self):
+        """Wait for all the background dot processes to finish."""
+        while self._running:
+            self._finish(self._running.pop(0))
+
+    def resolve(self, html):
+        """
+        Fill in the image maps of any graphs in `html` that were
+        rendered in the background, and remove any graphs that could
+        not be rendered.  The result is ascii encoded, with character
+        references for non-ascii characters in the image maps.
+        """
+        if '<!--epydoc-graph:' not in html: return html
+        self.wait()
+        return self._DEFERRED_GRAPH_RE.sub(self._resolve_graph, html)
+
+    def _resolve_graph(self, m):
+        """Helper for `resolve()`"""
+        job, html = int(m.group(1)), m.group(2)
+        cmapx = self._results.get(job)
+        if cmapx is None: return ''
+        try:
+            cmapx = cmapx.decode('utf-8')
+        except UnicodeDecodeError:
+            log.debug('unable to decode cmapx from dot; graph will '
+                      'not have clickable regions')
+            cmapx = u''
+        cmapx = cmapx.strip().encode('ascii', 'xmlcharrefreplace')
+        return html.replace('<!--epydoc-cmapx:%d-->' % job, cmapx)
+
+    def _finish(self, running):
+        """Wait for a background dot process, and collect its result."""
+        job, key, image_file, process, stdout, stderr = running
+        process.wait()
+        stdout.seek(0)
+        stderr.seek(0)
+        out, err = stdout.read(), stderr.read()
+        stdout.close()
+        stderr.close()
+        if process.returncode != 0:
+            e = RunSubprocessError([DOT_COMMAND], out, err)
+            log.warning("Unable to render Graphviz dot graph:\n%s" % e)
+            self._results[job] = None
+            return
+        if err: log.warning("Graphviz dot warning(s):\n%s" % err)
+        self._results[job] = out
+        self._cache_put(key, image_file, out)
+
+    def _cache_get(self, key, image_file):
+        """
+        If the graph with the given key is in the cache, then copy its
+        image to `image_file` and return its cmapx.
+        """
+        if DOT_CACHE_DIR is None: return None
+        path = os.path.join(DOT_CACHE_DIR, key)
+        try:
+            cmapx = open(path + '.cmapx', 'rb').read()
+            shutil.copyfile(path + '.gif', image_file)
+        except (IOError, OSError):
+            return None
+        return cmapx
+
+    def _cache_put(self, key, image_file, cmapx):
+        """Add a rendered graph to the cache."""
+        if DOT_CACHE_DIR is None: return
+        path = os.path.join(DOT_CACHE_DIR, key)
+        try:
+            if not os.path.isdir(DOT_CACHE_DIR):
+                os.makedirs(DOT_CACHE_DIR)
+            # Write the image first: a cmapx without an image is never
+            # treated as a cache hit.
+            shutil.copyfile(image_file, path + '.gif')
+            out = open(path + '.cmapx.tmp', 'wb')
+            out.write(cmapx)
+            out.close()
+            os.rename(path + '.cmapx.tmp', path + '.cmapx')
+        except (IOError, OSError), e:
+            log.debug('Unable to cache Graphviz dot graph: %s' % e)
+
+DOT_RENDERER = DotRenderer()
+"""The `DotRenderer` used by `DotGraph.to_html()`."""
+
 ######################################################################
 #{ Helper Functions
 ######################################################################
@@ -1280,6 +1484,22 @@ def add_valdoc_nodes(graph, val_docs, linker, context):
         specialize_valdoc_node(node, val_doc, context, linker.url_for(val_doc))
     return nodes
 
+def _sort_nodes(nodes):
+    """
+    Return the given nodes in the order they were created.  Graphs
+    should not depend on the iteration order of dicts or sets keyed by
+    `APIDoc`, so that the same input always gives the same dot file
+    (see `DotRenderer`).
+    """
+    return sorted(nodes, key=lambda node: node.id)
+
+def _sort_edges(edges):
+    """
+    Return the given ``(src, dst)`` node pairs in the order their nodes
+    were created.  See `_sort_nodes()`.
+    """
+    return sorted(edges, key=lambda edge: (edge[0].id, edge[1].id))
+
 NOOP_URL = 'javascript:void(0);'
 MODULE_NODE_HTML = '''
   <TABLE BORDER="0" CELLBORDER="0" CELLSPACING="0"
@@ -14,7 +14,8 @@ this module is the L{HTMLWriter} class.
 """
 __docformat__ = 'epytext en'
 
-import re, os, sys, codecs, sre_constants, pprint, base64, json
+import re, os, sys, sre_constants, pprint, base64, json
+import shutil, tempfile, zipfile
 import urllib
 import __builtin__
 from epydoc.apidoc import *
@@ -287,6 +288,16 @@ class HTMLWriter:
         @type include_source_code: C{boolean}
         @keyword include_source_code: If true, then generate colorized
               source code files for each python module.
+        @type sourcecode_pages: C{string}
+        @keyword sourcecode_pages: When the colorized source code files
+              should be written.  If C{sourcecode_pages='write'}, then
+              they are written along with the other pages; if
+              C{sourcecode_pages='defer'}, then the other pages link to
+              them, but they are not written; and if
+              C{sourcecode_pages='only'}, then I{only} the source code
+              files are written.  Deferring the source code files lets
+              them be written by a separate (later) run, e.g. from a
+              pickled documentation index.  The default is 'write'.
         @type include_log: C{boolean}
         @keyword include_log: If true, the the footer will include an
               href to the page 'epydoc-log.html'.
@@ -348,6 +359,10 @@ class HTMLWriter:
         self._incl_sourcecode = kwargs.get('include_source_code', True)
         """Should pages be generated for source code of modules?"""
 
+        self._sourcecode_pages = kwargs.get('sourcecode_pages', 'write')
+        """When should the source code pages be written?  'write',
+        'defer', or 'only'"""
+
         self._mark_docstrings = kwargs.get('mark_docstrings', False)
         """Wrap <span class='docstring'>...</span> around docstrings?"""
 
@@ -414,6 +429,9 @@ class HTMLWriter:
         if self.module_list: self._trees_url = 'module-tree.html'
         else: self._trees_url = 'class-tree.html'
 
+        # Precompute the urls of the documented objects.
+        self._build_url_table()
+
         # Construct the value for self.indexed_docs.
         self.indexed_docs += [d for d in valdocs
                               if not isinstance(d, GenericValueDoc)]
@@ -440,7 +458,7 @@ class HTMLWriter:
         if self._frames_index:
             self._num_files += len(self.module_list) + 3
 
-        if self._incl_sourcecode:
+        if self._incl_sourcecode and self._sourcecode_pages == 'write':
             self._num_files += len(self.modules_with_sourcecode)
             
     def _find_top_page(self, pagename):
@@ -509,11 +527,16 @@ class HTMLWriter:
         @param directory: The directory to which output should be
             written.  If no directory is specified, output will be
             written to the current directory.  If the directory does
-            not exist, it will be created.
+            not exist, it will be created.  If C{directory} ends with
+            C{".zip"}, then the output is written directly to a zip
+            archive with that name instead.
         @rtype: C{None}
         @raise OSError: If C{directory} cannot be created.
         @raise OSError: If any file cannot be created or written to.
         """
+        if self._sourcecode_pages == 'only':
+            return self.write_sourcecode_pages(directory)
+
         # For progress reporting:
         self._files_written = 0.
         
@@ -535,61 +558,58 @@ class HTMLWriter:
         # Keep track of failed xrefs, and report them at the end.
         self._failed_xrefs = {}
 
-        # Create destination directories, if necessary
-        if not directory: directory = os.curdir
-        self._mkdir(directory)
-        self._directory = directory
+        # Pages that contain graphs being rendered in the background.
+        self._pages_with_graphs = []
 
-        # Write the CSS file.
-        self._files_written += 1
-        log.progress(self._files_written/self._num_files, 'epydoc.css')
-        self.write_css(directory, self._css)
-
-        # Write the Javascript file.
-        self._files_written += 1
-        log.progress(self._files_written/self._num_files, 'epydoc.js')
-        self.write_javascript(directory)
-
-        # Write images
-        self.write_images(directory)
-
-        # Build the indices.
-        indices = {'ident': self.build_identifier_index(),
-                   'term': self.build_term_index()}
-        for (name, label, label2) in self.METADATA_INDICES:
-            indices[name] = self.build_metadata_index(name)
-
-        # Write the object documentation.
-        for doc in self.module_list:
-            filename = urllib.unquote(self.url(doc))
-            self._write(self.write_module, directory, filename, doc)
-        for doc in self.class_list:
-            filename = urllib.unquote(self.url(doc))
-            self._write(self.write_class, directory, filename, doc)
-
-        # Write source code files.
-        if self._incl_sourcecode:
-            # Build a map from short names to APIDocs, used when
-            # linking names in the source code.
-            name_to_docs = {}
-            for api_doc in self.indexed_docs:
-                if (api_doc.canonical_name is not None and
-                    self.url(api_doc) is not None):
-                    name = api_doc.canonical_name[-1]
-                    name_to_docs.setdefault(name, []).append(api_doc)
-            # Sort each entry of the name_to_docs list.
-            for doc_list in name_to_docs.values():
-                doc_list.sort()
-            # Write the source code for each module.
-            for doc in self.modules_with_sourcecode:
-                filename = urllib.unquote(self.pysrc_url(doc))
-                self._write(self.write_sourcecode, directory, filename, doc,
-                            name_to_docs)
-
-        # Write the auto-redirect page.
-        self._write(self.write_redirect_page, directory, 'redirect.html')
-
-        self._write(self.write_babbledrive_data, directory, 'babbledrive-data.js')
+        # Create destination directories, if necessary
+        directory = self._open_output(directory)
+        complete = False
+        try:
+            # Write the CSS file.
+            self._files_written += 1
+            log.progress(self._files_written/self._num_files, 'epydoc.css')
+            self.write_css(directory, self._css)
+
+            # Write the Javascript file.
+            self._files_written += 1
+            log.progress(self._files_written/self._num_files, 'epydoc.js')
+            self.write_javascript(directory)
+
+            # Write images
+            self.write_images(directory)
+
+            # Build the indices.
+            indices = {'ident': self.build_identifier_index(),
+                       'term': self.build_term_index()}
+            for (name, label, label2) in self.METADATA_INDICES:
+                indices[name] = self.build_metadata_index(name)
+
+            # Write the object documentation.
+            for doc in self.module_list:
+                filename = urllib.unquote(self.url(doc))
+                self._write(self.write_module, directory, filename, doc)
+            for doc in self.class_list:
+                filename = urllib.unquote(self.url(doc))
+                self._write(self.write_class, directory, filename, doc)
+
+            # Write source code files.
+            if self._incl_sourcecode and self._sourcecode_pages == 'write':
+                self._write_sourcecode_pages(directory)
+
+            # Write the auto-redirect page.
+            self._write(self.write_redirect_page, directory, 'redirect.html')
+
+            self._write(self.write_babbledrive_data, directory,
+                        'babbledrive-data.js')
+
+            # Fill in the graphs that were rendered in the background.
+            for (filename, page) in self._pages_with_graphs:
+                self._write_file(directory, filename,
+                                 DOT_RENDERER.resolve(page))
+            self._pages_with_graphs = []
+            complete = True
+        finally:
+            self._close_output(directory, complete)
 
         # Don't report references to builtins as missing
         for k in self._failed_xrefs.keys(): # have a copy of keys
@@ -621,14 +641,146 @@ class HTMLWriter:
          ValueDoc.REPR_MAXLINES) = orig_valdoc_defaults
         ParsedEpytextDocstring.SYMBOL_TO_HTML['crarr'] = orig_crarr_html
 
+    def write_sourcecode_pages(self, directory=None):
+        """
+        Write the colorized source code pages to the given directory.
+        This is only needed if the source code pages were deferred
+        (see the C{sourcecode_pages} option); otherwise, L{write()}
+        writes them along with the other pages.  If C{directory} is a
+        zip archive, then the pages are added to it.
+
+        @type directory: C{string}
+        @param directory: The directory to which output should be
+            written.
+        @rtype: C{None}
+        """
+        self._files_written = 0.
+        self._num_files = len(self.modules_with_sourcecode)
+        self._pages_with_graphs = []
+        if not self._incl_sourcecode: return
+        directory = self._open_output(directory, append=True)
+        complete = False
+        try:
+            self._write_sourcecode_pages(directory)
+            complete = True
+        finally:
+            self._close_output(directory, complete)
+
+    def _write_sourcecode_pages(self, directory):
+        # Build a map from short names to APIDocs, used when
+        # linking names in the source code.
+        name_to_docs = {}
+        for api_doc in self.indexed_docs:
+            if (api_doc.canonical_name is not None and
+                self.url(api_doc) is not None):
+                name = api_doc.canonical_name[-1]
+                name_to_docs.setdefault(name, []).append(api_doc)
+        # Sort each entry of the name_to_docs list.
+        for doc_list in name_to_docs.values():
+            doc_list.sort()
+        # Write the source code for each module.
+        for doc in self.modules_with_sourcecode:
+            filename = urllib.unquote(self.pysrc_url(doc))
+            self._write(self.write_sourcecode, directory, filename, doc,
+                        name_to_docs)
+
+    def _open_output(self, directory, append=False):
+        """
+        Prepare to write output to C{directory}, creating it if
+        necessary, and return the directory that files should be
+        written to.  When writing to a zip archive, the pages and
+        graph images are written to a temporary directory, and added
+        to the archive by L{_close_output()}.  That way a page that is
+        written twice (e.g. when a module is shadowed by a variable of
+        the same name) only appears once in the archive, with the
+        contents of the last write, just as it would in a directory.
+        """
+        if not directory: directory = os.curdir
+        if directory.endswith('.zip'):
+            self._zip_path = directory
+            self._zip_append = append and os.path.exists(directory)
+            directory = tempfile.mkdtemp()
+        else:
+            self._zip_path = None
+            self._mkdir(directory)
+        self._directory = directory
+        return directory
+
+    def _close_output(self, directory, complete=True):
+        """
+        Finish writing output to C{directory}.  When writing to a zip
+        archive, move the files that were written into the archive,
+        replacing any members of the same names that it already had;
+        then remove the temporary directory.  If C{complete} is false
+        (because writing failed), then the graph images are not waited
+        for.
+        """
+        if self._zip_path is None: return
+        try:
+            if complete:
+                DOT_RENDERER.wait()
+            filenames = sorted(os.listdir(directory))
+
+            # Keep the members of an existing archive that are not
+            # being replaced.  zipfile can't remove members, so if any
+            # are being replaced, the archive is written out again.
+            kept = []
+            mode = 'w'
+            if self._zip_append:
+                archive = zipfile.ZipFile(self._zip_path, 'r')
+                try:
+                    names = archive.namelist()
+                    if set(names).intersection(filenames):
+                        replaced = set(filenames)
+                        for name in names:
+                            if name not in replaced:
+                                replaced.add(name)
+                                kept.append((archive.getinfo(name),
+                                             archive.read(name)))
+                    else:
+                        mode = 'a'
+                finally:
+                    archive.close()
+
+            archive = zipfile.ZipFile(self._zip_path, mode,
+                                      zipfile.ZIP_DEFLATED)
+            try:
+                for (info, data) in kept:
+                    archive.writestr(info, data)
+                for filename in filenames:
+                    archive.write(os.path.join(directory, filename),
+                                  filename)
+            finally:
+                archive.close()
+        finally:
+            self._zip_path = None
+            shutil.rmtree(directory, ignore_errors=True)
+
     def _write(self, write_func, directory, filename, *args):
         # Display our progress.
         self._files_written += 1
         log.progress(self._files_written/self._num_files, filename)
         
-        path = os.path.join(directory, filename)
-        f = codecs.open(path, 'w', 'ascii', errors='xmlcharrefreplace')
-        write_func(f.write, *args)
+        # Collect the page in memory, and encode it all at once.
+        chunks = []
+        write_func(chunks.append, *args)
+        page = u''.join(chunks).encode('ascii', 'xmlcharrefreplace')
+
+        # Pages with graphs that are still being rendered are written
+        # once the graphs are done.
+        if '<!--epydoc-graph:' in page:
+            self._pages_with_graphs.append((filename, page))
+        else:
+            self._write_file(directory, filename, page)
+
+    def _write_file(self, directory, filename, data):
+        """
+        Write the string C{data} to the output file C{filename} in
+        C{directory}.
+        @rtype: C{None}
+        """
+        f = open(os.path.join(directory, filename), 'wb')
+        f.write(data)
         f.close()
 
     def _mkdir(self, directory):
@@ -870,8 +1022,6 @@ class HTMLWriter:
 
         @rtype: C{None}
         """
-        filename = os.path.join(directory, 'epydoc.css')
-        
         # Get the contents for the stylesheet file.
         if cssname is None:
             css = STYLESHEETS['default'][0]
@@ -885,26 +1035,20 @@ class HTMLWriter:
                 raise IOError("Can't find CSS file: %r" % cssname)
 
         # Write the stylesheet.
-        cssfile = open(filename, 'w')
-        cssfile.write(css)
-        cssfile.close()
+        self._write_file(directory, 'epydoc.css', css)
 
     #////////////////////////////////////////////////////////////
     #{ 2.9. Javascript (epydoc.js)
     #////////////////////////////////////////////////////////////
 
     def write_javascript(self, directory):
-        jsfile = open(os.path.join(directory, 'epydoc.js'), 'w')
-        print >> jsfile, self.TOGGLE_PRIVATE_JS
-        print >> jsfile, self.SHOW_PRIVATE_JS
-        print >> jsfile, self.GET_COOKIE_JS
-        print >> jsfile, self.SET_FRAME_JS
-        print >> jsfile, self.HIDE_PRIVATE_JS
-        print >> jsfile, self.TOGGLE_CALLGRAPH_JS
-        print >> jsfile, html_colorize.PYSRC_JAVASCRIPTS
-        print >> jsfile, self.GET_ANCHOR_JS
-        print >> jsfile, self.REDIRECT_URL_JS
-        jsfile.close()
+        scripts = [self.TOGGLE_PRIVATE_JS, self.SHOW_PRIVATE_JS,
+                   self.GET_COOKIE_JS, self.SET_FRAME_JS,
+                   self.HIDE_PRIVATE_JS, self.TOGGLE_CALLGRAPH_JS,
+                   html_colorize.PYSRC_JAVASCRIPTS, self.GET_ANCHOR_JS,
+                   self.REDIRECT_URL_JS]
+        self._write_file(directory, 'epydoc.js',
+                         ''.join(['%s\n' % js for js in scripts]))
 
     #: A javascript that is used to show or hide the API documentation
     #: for private objects.  In order for this to work correctly, all
@@ -1170,9 +1314,7 @@ class HTMLWriter:
 
     def write_images(self, directory):
         for (name, data) in self.IMAGES.items():
-            f = open(os.path.join(directory, name), 'wb')
-            f.write(base64.decodestring(data))
-            f.close()
+            self._write_file(directory, name, base64.decodestring(data))
 
     #////////////////////////////////////////////////////////////
     #{ 3.1. Page Header
@@ -2581,17 +2723,75 @@ class HTMLWriter:
         ''')
         # \------------------------------------------------------------/
 
-    _url_cache = {}
+    def _build_url_table(self):
+        """
+        Precompute the URLs for the documented modules and classes,
+        and for the variables they contain, in a single pass.  The
+        tables are keyed by canonical name, so L{url()} never needs to
+        quote names or join strings for documented objects.
+        """
+        self._url_table = {}
+        """Maps the canonical name of each documented module and class
+        to its URL."""
+        self._var_url_table = {}
+        """Maps the canonical name of each L{VariableDoc} to its URL."""
+        self._val_url_table = {}
+        """Maps the canonical name of each non-namespace L{ValueDoc} to
+        its URL."""
+        self._name_url_table = {}
+        """Maps each L{DottedName} that has been looked up to its URL."""
+
+        for doc in self.module_list:
+            self._url_table[doc.canonical_name] = (
+                urllib.quote('%s' % doc.canonical_name) + '-module.html')
+        for doc in self.class_list:
+            self._url_table[doc.canonical_name] = (
+                urllib.quote('%s' % doc.canonical_name) + '-class.html')
+
+        for doc in self.module_list + self.class_list:
+            for var_doc in doc.variables.values():
+                # Inherited variables are recorded by their container.
+                if (var_doc.container is not doc or
+                    var_doc.canonical_name is UNKNOWN): continue
+                self._var_url_table[var_doc.canonical_name] = \
+                                    self._url(var_doc)
+                val_doc = var_doc.value
+                if (isinstance(val_doc, ValueDoc) and
+                    not isinstance(val_doc, (NamespaceDoc, GenericValueDoc))
+                    and val_doc.canonical_name == var_doc.canonical_name):
+                    self._val_url_table[val_doc.canonical_name] = \
+                                        self._url(val_doc)
+
     def url(self, obj):
         """
         Return the URL for the given object, which can be a
         C{VariableDoc}, a C{ValueDoc}, or a C{DottedName}.
         """
-        cached_url = self._url_cache.get(id(obj))
-        if cached_url is not None:
-            return cached_url
+        if isinstance(obj, (ModuleDoc, ClassDoc)):
+            if obj not in self.module_set and obj not in self.class_set:
+                return None
+            return self._url_table[obj.canonical_name]
+        elif isinstance(obj, VariableDoc):
+            url = self._var_url_table.get(obj.canonical_name)
+            if url is None: url = self._url(obj)
+            return url
+        elif isinstance(obj, GenericValueDoc):
+            return None
+        elif isinstance(obj, ValueDoc):
+            table = self._val_url_table
+            name = obj.canonical_name
+        elif isinstance(obj, DottedName):
+            table = self._name_url_table
+            name = obj
         else:
-            url = self._url_cache[id(obj)] = self._url(obj)
+            return self._url(obj)
+
+        # The urls of other values and dotted names only depend on
+        # their names, so they can be cached as they are looked up.
+        try:
+            return table[name]
+        except KeyError:
+            url = table[name] = self._url(obj)
             return url
 
     def _url(self, obj):
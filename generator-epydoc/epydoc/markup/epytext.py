@@ -1764,6 +1764,7 @@ class ParsedEpytextDocstring(ParsedDocstring):
         self._tree = dom_tree
         # Caching:
         self._html = self._latex = self._plaintext = None
+        self._html_context = None
         self._terms = None
         # inline option -- mark top-level children as inline.
         if options.get('inline') and self._tree is not None:
@@ -1775,11 +1776,17 @@ class ParsedEpytextDocstring(ParsedDocstring):
         
     def to_html(self, docstring_linker, directory=None, docindex=None,
                 context=None, **options):
-        if self._html is not None: return self._html
+        # The same parsed docstring may be shared by several objects
+        # (see docstringparser.DocstringParseCache), and crossreferences
+        # are resolved relative to the context; so only reuse the cached
+        # html if it was generated for the same context.
+        if self._html is not None and self._html_context is context:
+            return self._html
         if self._tree is None: return ''
         indent = options.get('indent', 0)
         self._html = self._to_html(self._tree, docstring_linker, directory, 
                                    docindex, context, indent)
+        self._html_context = context
         return self._html
 
     def to_latex(self, docstring_linker, **options):
@@ -20,11 +20,15 @@ Creating C{ParsedRstDocstring}s
 ===============================
 
 C{ParsedRstDocstring}s are created by the C{parse_document} function,
-using the C{docutils.core.publish_string()} method, with the following
-helpers:
+using a L{_DocstringParsingSession}, which does the work of the
+C{docutils.core.publish_string()} function without rebuilding its
+settings and components for every docstring.  The session uses the
+following helpers:
 
   - An L{_EpydocReader} is used to capture all error messages as it
     parses the docstring.
+  - A L{_ReusableRstParser} keeps one reStructuredText state machine
+    for all of the docstrings it parses.
   - A L{_DocumentPseudoWriter} is used to extract the document itself,
     without actually writing any output.  The document is saved for
     further processing.  The settings for the writer are copied from
@@ -69,7 +73,7 @@ __docformat__ = 'epytext en'
 import re, os, os.path
 from xml.dom.minidom import *
 
-from docutils.core import publish_string
+from docutils.io import StringInput, StringOutput
 from docutils.writers import Writer
 from docutils.writers.html4css1 import HTMLTranslator, Writer as HTMLWriter
 from docutils.writers.latex2e import LaTeXTranslator, Writer as LaTeXWriter
@@ -78,7 +82,9 @@ from docutils.utils import new_document
 from docutils.nodes import NodeVisitor, Text, SkipChildren
 from docutils.nodes import SkipNode, TreeCopyVisitor
 from docutils.frontend import OptionParser
-from docutils.parsers.rst import directives, roles
+from docutils.parsers.rst import directives, roles, states
+import docutils.parsers.rst
+import docutils.statemachine
 import docutils.nodes
 import docutils.transforms.frontmatter
 import docutils.transforms
@@ -127,13 +133,91 @@ def parse_docstring(docstring, errors, **options):
         Currently, no extra options are defined.
     @rtype: L{ParsedDocstring}
     """
-    writer = _DocumentPseudoWriter()
-    reader = _EpydocReader(errors) # Outputs errors to the list.
-    publish_string(docstring, writer=writer, reader=reader,
-                   settings_overrides={'report_level':10000,
-                                       'halt_level':10000,
-                                       'warning_stream':None})
-    return ParsedRstDocstring(writer.document)
+    global _parsing_session
+    if _parsing_session is None:
+        _parsing_session = _DocstringParsingSession()
+    return ParsedRstDocstring(_parsing_session.parse(docstring, errors))
+
+#: The L{_DocstringParsingSession} used by L{parse_docstring}; created
+#: the first time a docstring is parsed.
+_parsing_session = None
+
+class _DocstringParsingSession:
+    """
+    A long-lived replacement for C{docutils.core.publish_string()}, used
+    to parse docstrings one after another.
+
+    C{publish_string()} builds a new publisher for each call, which
+    means constructing an option parser from every component's
+    settings spec (and reading the docutils config files) just to find
+    the default settings, and creating a new reader, parser and state
+    machine.  The session does all of that once, and only creates the
+    objects that really belong to one docstring: its input, its
+    document, and a copy of the settings (since some transforms modify
+    the settings of the document they are applied to).
+    """
+    def __init__(self):
+        self.reader = _EpydocReader(None)
+        self.reader.parser = _ReusableRstParser()
+        self.writer = _DocumentPseudoWriter()
+        option_parser = OptionParser(
+            components=(self.reader.parser, self.reader, self.writer),
+            defaults={'report_level':10000, 'halt_level':10000,
+                      'warning_stream':None, 'traceback':1},
+            read_config_files=1)
+        self.settings = option_parser.get_default_values()
+
+    def parse(self, docstring, errors):
+        """
+        Parse the given docstring, appending any errors to C{errors},
+        and return the resulting document.
+        @rtype: C{docutils.nodes.document}
+        """
+        settings = self.settings.copy()
+        source = StringInput(source=docstring,
+                             encoding=settings.input_encoding)
+        destination = StringOutput(
+            encoding=settings.output_encoding,
+            error_handler=settings.output_encoding_error_handler)
+        self.reader._errors = errors # Outputs errors to the list.
+        try:
+            document = self.reader.read(source, self.reader.parser, settings)
+            document.transformer.populate_from_components(
+                (source, self.reader, self.reader.parser, self.writer,
+                 destination))
+            document.transformer.apply_transforms()
+        finally:
+            self.reader._errors = None
+            self.reader.document = self.reader.input = None
+        return document
+
+class _ReusableRstParser(docutils.parsers.rst.Parser):
+    """
+    A reStructuredText parser that keeps its state machine from one
+    document to the next, rather than building a new one (and all of
+    its states and their transitions) for each document.  All of the
+    state machine's per-document state is reset when it is run.
+    """
+    statemachine = None
+
+    def parse(self, inputstring, document):
+        self.setup_parse(inputstring, document)
+        if self.statemachine is None:
+            self.statemachine = states.RSTStateMachine(
+                state_classes=self.state_classes,
+                initial_state=self.initial_state,
+                debug=document.reporter.debug_flag)
+        inputlines = docutils.statemachine.string2lines(
+            inputstring, tab_width=document.settings.tab_width,
+            convert_whitespace=1)
+        try:
+            self.statemachine.run(inputlines, document, inliner=self.inliner)
+        except:
+            # Don't reuse a state machine that was interrupted.
+            self.statemachine = None
+            raise
+        self.finish_parse()
+        self.document = self.inputstring = None
 
 class OptimizedReporter(docutils.utils.Reporter):
     """A reporter that ignores all debug messages.  This is used to
@@ -192,10 +276,16 @@ class ParsedRstDocstring(ParsedDocstring):
     def to_html(self, docstring_linker, directory=None,
                 docindex=None, context=None, **options):
         # Inherit docs
-        visitor = _EpydocHTMLTranslator(self._document, docstring_linker,
-                                        directory, docindex, context)
-        self._document.walkabout(visitor)
-        return ''.join(visitor.body)
+        if _html_translators:
+            visitor = _html_translators.pop()
+            visitor.reset(self._document, docstring_linker, directory,
+                          docindex, context)
+        else:
+            visitor = _EpydocHTMLTranslator(self._document, docstring_linker,
+                                            directory, docindex, context)
+        html = visitor.translate()
+        _html_translators.append(visitor)
+        return html
 
     def to_latex(self, docstring_linker, **options):
         # Inherit docs
@@ -579,8 +669,18 @@ class _EpydocLaTeXTranslator(LaTeXTranslator):
         self.body.append(doctest_to_latex(node[0].astext()))
         raise SkipNode()
 
+#: L{_EpydocHTMLTranslator}s that are not in use, kept by
+#: L{ParsedRstDocstring.to_html} for the next docstring.
+_html_translators = []
+
 class _EpydocHTMLTranslator(HTMLTranslator):
     settings = None
+
+    #: The attributes that are specific to the document being
+    #: translated, and are set by L{reset()}.
+    _DOCUMENT_ATTRIBUTES = ('document', '_linker', '_directory',
+                            '_docindex', '_context')
+
     def __init__(self, document, docstring_linker, directory,
                  docindex, context):
         self._linker = docstring_linker
@@ -597,6 +697,63 @@ class _EpydocHTMLTranslator(HTMLTranslator):
         # Call the parent constructor.
         HTMLTranslator.__init__(self, document)
 
+        # Remember the state we start with, for reset().  Leave out the
+        # per-document attributes, which reset() sets anyway, so that a
+        # pooled translator doesn't keep its first document alive.
+        self._initial_state = self._copy_state(self.__dict__)
+        for name in self._DOCUMENT_ATTRIBUTES:
+            del self._initial_state[name]
+
+    def reset(self, document, docstring_linker, directory,
+              docindex, context):
+        """
+        Prepare this translator to translate another document, by
+        returning it to the state it was created in.  This is much
+        cheaper than creating a new translator, since
+        C{HTMLTranslator.__init__} looks up the language module and
+        reads the stylesheet every time.
+        """
+        state = self._initial_state
+        self.__dict__.clear()
+        self.__dict__.update(self._copy_state(state))
+        self._initial_state = state
+
+        self.document = document
+        self._linker = docstring_linker
+        self._directory = directory
+        self._docindex = docindex
+        self._context = context
+        document.settings = self.settings
+
+    def _copy_state(self, state):
+        """
+        Return a copy of the attribute dictionary C{state}, which shares
+        no lists (like C{self.body}) or dictionaries with it.
+        """
+        state = state.copy()
+        for (name, value) in state.items():
+            if isinstance(value, list): state[name] = value[:]
+            elif isinstance(value, dict): state[name] = value.copy()
+        return state
+
+    def translate(self):
+        """
+        Translate C{self.document}, and return the HTML.
+        """
+        document = self.document
+        # Most docstrings (and all summaries) are a single paragraph of
+        # plain text.  It is compact (see should_be_compact_paragraph),
+        # so it translates to its encoded text; skip the tree walk.
+        if (len(document.children) == 1 and
+            document[0].__class__ is docutils.nodes.paragraph):
+            texts = [child for child in document[0].children
+                     if child.__class__ is Text]
+            if len(texts) == len(document[0].children):
+                return ''.join([self.encode(text.astext())
+                                for text in texts])
+        document.walkabout(self)
+        return ''.join(self.body)
+
     # Handle interpreted text (crossreferences)
     def visit_title_reference(self, node):
         target = self.encode(node.astext())
@@ -1,8 +1,10 @@
 """Convert ASTs into L{pydoctor.model.Documentable} instances."""
+import pydoctor
 from pydoctor import model, ast_pp
 
 from compiler import visitor, transformer, ast
-import symbol, token
+from hashlib import sha1
+import cPickle, os, sys, symbol, token
 
 class str_with_orig(str):
     """Hack to allow recovery of the literal that gave rise to a docstring in an AST.
@@ -59,6 +61,84 @@ def parseFile(path):
     return parse(src)
 
 
+class ParseCache(object):
+    """An on-disk cache of parsed modules.
+
+    There is one file in C{directory} for each source file, holding the
+    source file's size, mtime and sha1 along with its pickled AST.  The
+    AST is used if the size and mtime still match, or if they don't but
+    the contents are the same.  Entries made by a different version of
+    this module (and so possibly of L{MyTransformer}) or of Python, or
+    for a different system class, are ignored.
+
+    Instances are picklable, so they can be used by worker processes.
+    """
+
+    def __init__(self, directory, systemclass):
+        self.directory = directory
+        self.salt = '%s\0%s\0%s\0%s.%s' % (
+            pydoctor.version_info, _sourceDigest(), sys.version,
+            systemclass.__module__, systemclass.__name__)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def _entryPath(self, path):
+        key = sha1(self.salt + '\0' + os.path.abspath(path)).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def parse(self, path):
+        """Return the AST for C{path}, or None if it could not be parsed."""
+        st = os.stat(path)
+        entry = self._entryPath(path)
+        header, ast = self._load(entry)
+        if header is not None and header[:2] == (st.st_size, st.st_mtime):
+            return ast
+        f = open(path, "U")
+        src = f.read() + "\n"
+        f.close()
+        digest = sha1(src).hexdigest()
+        if header is None or header[2] != digest:
+            try:
+                ast = parse(src)
+            except (SyntaxError, ValueError):
+                ast = None
+        self._store(entry, (st.st_size, st.st_mtime, digest), ast)
+        return ast
+
+    def _load(self, entry):
+        try:
+            f = open(entry, 'rb')
+            try:
+                return cPickle.load(f)
+            finally:
+                f.close()
+        except Exception:
+            return None, None
+
+    def _store(self, entry, header, ast):
+        tmp = '%s.%d.tmp' % (entry, os.getpid())
+        f = open(tmp, 'wb')
+        cPickle.dump((header, ast), f, cPickle.HIGHEST_PROTOCOL)
+        f.close()
+        os.rename(tmp, entry)
+
+    __call__ = parse
+
+
+def _sourceDigest():
+    """Return the sha1 of this module's source, so that changes to
+    L{MyTransformer} invalidate the entries in a L{ParseCache}."""
+    path = os.path.splitext(__file__)[0] + '.py'
+    try:
+        f = open(path, 'rb')
+    except IOError:
+        return ''
+    try:
+        return sha1(f.read()).hexdigest()
+    finally:
+        f.close()
+
+
 def parse(buf):
     """Duplicate of L{compiler.parse} that uses L{MyTransformer}."""
     return MyTransformer().parsesuite(buf)
@@ -376,16 +456,52 @@ class ASTBuilder(object):
     def parseFile(self, filePath):
         if filePath in self.ast_cache:
             return self.ast_cache[filePath]
-        try:
-            ast = parseFile(filePath)
-        except (SyntaxError, ValueError):
+        if filePath in self.system.preparsed:
+            ast = self.system.preparsed.pop(filePath)
+        else:
+            ast = self._fileParser()(filePath)
+        if ast is None:
             self.warning("cannot parse", filePath)
-            ast = None
         self.ast_cache[filePath] = ast
         return ast
 
+    def parseFiles(self, filePaths, jobs):
+        """Parse C{filePaths} in C{jobs} worker processes.
+
+        @return: a dict mapping each path to its AST, or to None if it
+            could not be parsed (the warning for that is given by
+            L{parseFile}, when the module is processed).
+        """
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs)
+        try:
+            asts = pool.map(self._fileParser(), filePaths, 8)
+        finally:
+            pool.terminate()
+            pool.join()
+        return dict(zip(filePaths, asts))
+
+    def _fileParser(self):
+        """Return a function that parses a file, or returns None if it
+        can't, using the parse cache if there is one.  The function is
+        made once per system and shared by all its builders."""
+        if self.system.fileparser is None:
+            cachedir = self.system.options.parsecache
+            if cachedir is None:
+                self.system.fileparser = _parseFileOrNone
+            else:
+                self.system.fileparser = ParseCache(
+                    cachedir, self.system.__class__)
+        return self.system.fileparser
+
 model.System.defaultBuilder = ASTBuilder
 
+def _parseFileOrNone(path):
+    try:
+        return parseFile(path)
+    except (SyntaxError, ValueError):
+        return None
+
 def findAll(modast, mod):
     """Find and attempt to parse into a list of names the __all__ of a module's AST."""
     for node in modast.node.nodes:
@@ -39,7 +39,9 @@ def getparser():
     parser.add_option(
         '-o', '--output-pickle', dest='outputpickle',
         help=("Save the system to this pickle file (default: "
-              "none, the system is not saved by default)."))
+              "none, the system is not saved by default).  A flat "
+              "table of the system's objects is also written to the "
+              "same name with '.symbols' appended."))
     parser.add_option(
         '--extra-system', action='append', dest='moresystems',
         metavar='SYS:URLPREFIX', default=[],
@@ -120,6 +122,15 @@ def getparser():
         '--docformat', dest='docformat', action='store', default='epytext',
         help=("Which epydoc-supported format docstrings are assumed "
               "to be in."))
+    parser.add_option(
+        '--parse-jobs', dest='parsejobs', action='store', type=int,
+        default=1, metavar='N',
+        help=("Parse the source files using N worker processes before "
+              "processing them (default 1)."))
+    parser.add_option(
+        '--parse-cache', dest='parsecache', metavar='DIR',
+        help=("Keep the parsed source files in DIR, and reuse them on "
+              "later runs for files that have not changed."))
     parser.add_option(
         '--html-subject', dest='htmlsubjects', action='append',
         help=("The fullName of object to generate API docs for"
@@ -147,6 +158,12 @@ def getparser():
         '--html-viewsource-base', dest='htmlsourcebase',
         help=("This should be the path to the trac browser for the top "
               "of the svn checkout we are documenting part of."))
+    parser.add_option(
+        '--html-jobs', dest='htmljobs', action='store', type=int,
+        default=1, metavar='N',
+        help=("Write the individual HTML pages using N worker processes "
+              "(default 1).  The summary pages are always written by the "
+              "main process."))
     parser.add_option(
         '--html-use-sorttable', dest='htmlusesorttable',
         default=False, action="store_true",
@@ -348,6 +365,9 @@ def main(args):
             cPickle.dump(system, f, cPickle.HIGHEST_PROTOCOL)
             f.close()
             system.options = options
+            f = open(options.outputpickle + '.symbols', 'w')
+            system.writeSymbolTable(f)
+            f.close()
 
         # step 5: make html, if desired
 
@@ -380,6 +400,8 @@ def main(args):
                 writer.writeModuleIndex(system)
                 subjects = system.rootobjects
             writer.writeIndividualFiles(subjects, options.htmlfunctionpages)
+            system.msg('html', 'rendered %d docstrings, %d cache hits'%(
+                system.doc2htmlrenders, system.doc2htmlhits), thresh=1)
             if system.epytextproblems:
                 def p(msg):
                     system.msg(('epytext', 'epytext-summary'), msg, thresh=-1, topthresh=1)
@@ -397,6 +419,9 @@ def main(args):
                 cPickle.dump(system, f, cPickle.HIGHEST_PROTOCOL)
                 f.close()
                 system.options = options
+                f = open(options.outputpickle + '.symbols', 'w')
+                system.writeSymbolTable(f)
+                f.close()
 
         # Finally, if we should serve html, lets serve some html.
         if options.server:
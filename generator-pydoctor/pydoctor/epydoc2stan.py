@@ -9,14 +9,20 @@ import inspect, itertools, urllib
 def link(o):
     return urllib.quote(o.system.urlprefix+o.fullName()+'.html')
 
+_parsers = {}
+
 def get_parser(formatname):
+    if formatname in _parsers:
+        return _parsers[formatname]
     try:
         mod = __import__('epydoc.markup.' + formatname,
                          globals(), locals(), ['parse_docstring'])
     except ImportError, e:
-        return None, e
+        r = None, e
     else:
-        return mod.parse_docstring, None
+        r = mod.parse_docstring, None
+    _parsers[formatname] = r
+    return r
 
 def boringDocstring(doc, summary=False):
     """Generate an HTML representation of a docstring in a really boring way.
@@ -338,7 +344,24 @@ def reportErrors(obj, errs):
             p(err)
 
 def doc2html(obj, summary=False, docstring=None):
-    """Generate an HTML representation of a docstring"""
+    """Generate an HTML representation of a docstring
+
+    Unless C{docstring} is given, the result is kept in the system's
+    C{doc2htmlcache}, so each docstring is only rendered once in each of
+    its summary and full forms.  Errors are only reported the first time.
+    """
+    if docstring is not None:
+        return _doc2html(obj, summary, docstring)
+    system = obj.system
+    key = (obj, summary)
+    if key in system.doc2htmlcache:
+        system.doc2htmlhits += 1
+    else:
+        system.doc2htmlrenders += 1
+        system.doc2htmlcache[key] = _doc2html(obj, summary, None)
+    return system.doc2htmlcache[key]
+
+def _doc2html(obj, summary, docstring):
     origobj = obj
     if isinstance(obj, model.Package):
         obj = obj.contents['__init__']
@@ -8,6 +8,7 @@ being documented -- a System is a bad of Documentables, in some sense.
 
 import datetime
 import imp
+import json
 import os
 import posixpath
 import sys
@@ -41,6 +42,13 @@ class Documentable(object):
     @ivar sourceHref: ...
     @ivar kind: ...
     """
+    # The attributes every object has live in slots, which takes a lot
+    # less memory than an instance dict when there are hundreds of
+    # thousands of objects.  Other attributes still go in __dict__.
+    __slots__ = ('system', 'prefix', 'name', 'docstring', 'parent',
+                 'parentMod', 'doctarget', 'linenumber', 'contents',
+                 'orderedcontents', '_name2fullname', '__dict__')
+
     document_in_parent_page = False
     sourceHref = None
 
@@ -101,6 +109,15 @@ class Documentable(object):
 
     def _resolveName(self, name, verbose):
         """Helper for resolveDottedName."""
+        memo = self.system._resolvememo
+        if memo is None or verbose > 0:
+            return self._lookupName(name, verbose)
+        key = (self, name)
+        if key not in memo:
+            memo[key] = self._lookupName(name, verbose)
+        return memo[key]
+
+    def _lookupName(self, name, verbose):
         system = self.system
         obj = self
         while obj:
@@ -121,10 +138,15 @@ class Documentable(object):
             obj = obj.parent
         obj = self
         while obj:
-            for n, fn in obj._name2fullname.iteritems():
-                o2 = system.allobjects.get(fn)
-                if o2 and name in o2.contents:
-                    return o2.contents[name]
+            if system._importindex is not None:
+                contents = obj._importedContents()
+                if name in contents:
+                    return contents[name]
+            else:
+                for n, fn in obj._name2fullname.iteritems():
+                    o2 = system.allobjects.get(fn)
+                    if o2 and name in o2.contents:
+                        return o2.contents[name]
             obj = obj.parent
         if name in system.allobjects:
             return system.allobjects[name]
@@ -135,6 +157,26 @@ class Documentable(object):
             print "failed to find %r from %r"%(name, self.fullName())
         return None
 
+    def _importedContents(self):
+        """The contents of all the objects named in C{_name2fullname},
+        as one dict, for L{_lookupName}.  If several of them contain
+        the same name, the first one in C{_name2fullname} wins.
+
+        Only valid once the system has been processed; the result is
+        kept in the system's import index.
+        """
+        index = self.system._importindex
+        if self not in index:
+            allobjects = self.system.allobjects
+            contents = {}
+            for n, fn in self._name2fullname.iteritems():
+                o2 = allobjects.get(fn)
+                if o2:
+                    for k, v in o2.contents.iteritems():
+                        contents.setdefault(k, v)
+            index[self] = contents
+        return index[self]
+
     def resolveDottedName(self, dottedname, verbose=None):
         """XXX what is the difference between name2fullname,
         dottedNameToFullName and resolveDottedName??"""
@@ -181,6 +223,9 @@ class Documentable(object):
 
         @rtype: a member of the L{PrivacyClass} class/enum.
         """
+        privacy = self.system._privacy
+        if privacy is not None and self in privacy:
+            return privacy[self]
         return self.system.privacyClass(self)
 
     @property
@@ -191,11 +236,33 @@ class Documentable(object):
         """
         return self.privacyClass != PrivacyClass.HIDDEN
 
+    @classmethod
+    def _slotNames(cls):
+        if '_slotnames' not in cls.__dict__:
+            names = []
+            for c in reversed(cls.__mro__):
+                for k in c.__dict__.get('__slots__', ()):
+                    # skip slots hidden by a subclass, e.g. Package.doctarget
+                    if isinstance(getattr(cls, k), types.MemberDescriptorType):
+                        names.append(k)
+            cls._slotnames = names
+        return cls._slotnames
+
+    def _attributes(self):
+        """The object's attributes, from its slots and its __dict__."""
+        for k in self._slotNames():
+            try:
+                yield k, getattr(self, k)
+            except AttributeError:
+                pass
+        for item in self.__dict__.iteritems():
+            yield item
+
     def __getstate__(self):
         # this is so very, very evil.
         # see doc/extreme-pickling-pain.txt for more.
         r = {}
-        for k, v in self.__dict__.iteritems():
+        for k, v in self._attributes():
             if isinstance(v, Documentable):
                 r['$'+k] = v.fullName()
             elif isinstance(v, list) and v:
@@ -225,6 +292,11 @@ class Documentable(object):
                 r[k] = v
         return r
 
+    def __setstate__(self, state):
+        # the $/@/! entries are resolved by System.__setstate__
+        for k, v in state.iteritems():
+            setattr(self, k, v)
+
 
 class Package(Documentable):
     kind = "Package"
@@ -239,11 +311,12 @@ class Package(Documentable):
 [UNPROCESSED, PROCESSING, PROCESSED] = range(3)
 
 class Module(Documentable):
+    __slots__ = ('state', 'all')
     kind = "Module"
-    state = UNPROCESSED
-    linenumber = 0
     def setup(self):
         super(Module, self).setup()
+        self.state = UNPROCESSED
+        self.linenumber = 0
         self.all = None
     def name2fullname(self, name):
         if name in self._name2fullname:
@@ -256,6 +329,7 @@ class Module(Documentable):
 
 
 class Class(Documentable):
+    __slots__ = ('bases', 'rawbases', 'baseobjects', 'subclasses')
     kind = "Class"
     def setup(self):
         super(Class, self).setup()
@@ -272,12 +346,68 @@ class Class(Documentable):
                 yield b2
 
 
+class ClassHierarchy(object):
+    """The class hierarchy of a processed system, sorted for display.
+
+    @ivar roots: The roots of the hierarchy of visible classes, as a
+        sorted list of C{(name, root)} pairs.  C{root} is either a class,
+        or, for a base that is not a visible class of the system, the
+        list of the system's classes that inherit from it.
+    """
+
+    def __init__(self, system):
+        self.system = system
+        self._subclasses = {}
+        self._visiblesubclasses = {}
+        roots = {}
+        for cls in system.objectsOfType(Class):
+            scs = sorted(cls.subclasses, key=_lowerFullName)
+            self._subclasses[cls] = scs
+            self._visiblesubclasses[cls] = [
+                sc for sc in scs if sc.system is system
+                and ' ' not in sc.fullName() and sc.isVisible]
+            if ' ' in cls.name or not cls.isVisible:
+                continue
+            if cls.bases:
+                for n, b in zip(cls.bases, cls.baseobjects):
+                    if b is None or not b.isVisible:
+                        roots.setdefault(n, []).append(cls)
+                    elif b.system is not system:
+                        roots[b.fullName()] = b
+            else:
+                roots[cls.fullName()] = cls
+        for n, root in roots.iteritems():
+            if isinstance(root, list):
+                root.sort(key=_lowerFullName)
+        self.roots = sorted(roots.items(), key=lambda x:x[0].lower())
+
+    def subclasses(self, cls):
+        """All the known subclasses of C{cls}, sorted by full name."""
+        if cls not in self._subclasses:
+            return sorted(cls.subclasses, key=_lowerFullName)
+        return self._subclasses[cls]
+
+    def visibleSubclasses(self, cls):
+        """The subclasses of C{cls} that belong in the system's class
+        hierarchy, sorted by full name."""
+        if cls not in self._visiblesubclasses:
+            return [sc for sc in self.subclasses(cls)
+                    if sc.system is self.system
+                    and ' ' not in sc.fullName() and sc.isVisible]
+        return self._visiblesubclasses[cls]
+
+
+def _lowerFullName(ob):
+    return ob.fullName().lower()
+
+
 class Function(Documentable):
+    __slots__ = ('argspec', 'decorators')
     document_in_parent_page = True
     kind = "Function"
-    linenumber = 0
     def setup(self):
         super(Function, self).setup()
+        self.linenumber = 0
         if isinstance(self.parent, Class):
             self.kind = "Method"
     def docsources(self):
@@ -316,6 +446,9 @@ class System(object):
     # not done here for circularity reasons:
     #defaultBuilder = astbuilder.ASTBuilder
     sourcebase = None
+    # (fullName, page class name, filename) for each page written by the
+    # html writer, see NevowWriter.planPages
+    pagePlan = None
 
     def __init__(self):
         self.allobjects = {}
@@ -338,6 +471,18 @@ class System(object):
         self.unprocessed_modules = set()
         self.module_count = 0
         self.processing_modules = []
+        self.preparsed = {} # filepath -> AST, see preParseModules
+        self.fileparser = None # see ASTBuilder._fileParser
+        # name resolution caches, see Documentable._resolveName; these
+        # are only used once all modules have been processed.
+        self._importindex = None
+        self._resolvememo = None
+        self._classhierarchy = None
+        self._privacy = None # obj -> PrivacyClass, see computePrivacy
+        # (obj, summary) -> rendered docstring, see epydoc2stan.doc2html
+        self.doc2htmlcache = {}
+        self.doc2htmlrenders = 0
+        self.doc2htmlhits = 0
         self.buildtime = datetime.datetime.now()
 
     def verbosity(self, section=None):
@@ -421,6 +566,36 @@ class System(object):
             print fn, type, detail
         self.warnings.setdefault(type, []).append((fn, detail))
 
+    def writeSymbolTable(self, f):
+        """Write a flat table of the objects in the system to the file
+        C{f}, for tools that don't need the whole object graph.
+
+        Each line is a JSON list C{[fullName, kind, parent's fullName,
+        bases, page]}, where C{bases} is None for objects that aren't
+        classes, and C{page} is the file the object was documented in by
+        the html writer (see L{pagePlan}), or None.
+        """
+        pages = {}
+        for fullName, pclass, filename in self.pagePlan or ():
+            pages[fullName] = filename
+        for o in self.orderedallobjects:
+            fullName = o.fullName()
+            if o.parent is None:
+                parent = None
+            else:
+                parent = o.parent.fullName()
+            f.write(json.dumps([fullName, o.kind, parent,
+                                getattr(o, 'bases', None),
+                                pages.get(fullName)]))
+            f.write('\n')
+
+    def classHierarchy(self):
+        """The L{ClassHierarchy} of this system, which is built the first
+        time it is asked for after processing."""
+        if self._classhierarchy is None:
+            self._classhierarchy = ClassHierarchy(self)
+        return self._classhierarchy
+
     def objectsOfType(self, cls):
         """Iterate over all instances of C{cls} present in the system. """
         for o in self.orderedallobjects:
@@ -433,9 +608,31 @@ class System(object):
             return PrivacyClass.PRIVATE
         return PrivacyClass.VISIBLE
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the name resolution caches are rebuilt by process()
+        state.pop('_importindex', None)
+        state.pop('_resolvememo', None)
+        state.pop('_classhierarchy', None)
+        state.pop('_privacy', None)
+        state.pop('doc2htmlcache', None)
+        state.pop('fileparser', None)
+        return state
+
     def __setstate__(self, state):
         if 'abbrevmapping' not in state:
             state['abbrevmapping'] = {}
+        if 'preparsed' not in state:
+            state['preparsed'] = {}
+        state['_importindex'] = state['_resolvememo'] = None
+        state['_classhierarchy'] = None
+        state['_privacy'] = None
+        state['doc2htmlcache'] = {}
+        state['fileparser'] = None
+        if 'doc2htmlhits' not in state:
+            state['doc2htmlhits'] = 0
+        if 'doc2htmlrenders' not in state:
+            state['doc2htmlrenders'] = 0
         # this is so very, very evil.
         # see doc/extreme-pickling-pain.txt for more.
         def lookup(name):
@@ -452,7 +649,7 @@ class System(object):
                 for k, v in obj.__dict__.copy().iteritems():
                     if k.startswith('$'):
                         del obj.__dict__[k]
-                        obj.__dict__[k[1:]] = lookup(v)
+                        setattr(obj, k[1:], lookup(v))
                     elif k.startswith('@'):
                         n = []
                         for vv in v:
@@ -461,13 +658,13 @@ class System(object):
                             else:
                                 n.append(lookup(vv))
                         del obj.__dict__[k]
-                        obj.__dict__[k[1:]] = n
+                        setattr(obj, k[1:], n)
                     elif k.startswith('!'):
                         n = {}
                         for kk, vv in v.iteritems():
                             n[kk] = lookup(vv)
                         del obj.__dict__[k]
-                        obj.__dict__[k[1:]] = n
+                        setattr(obj, k[1:], n)
 
     def addObject(self, obj):
         """Add C{object} to the system."""
@@ -675,6 +872,8 @@ class System(object):
     def processModule(self, mod):
         assert mod.state == UNPROCESSED
         mod.state = PROCESSING
+        self._importindex = self._resolvememo = None
+        self._classhierarchy = self._privacy = None
         if getattr(mod, 'filepath', None) is None:
             return
         builder = self.defaultBuilder(self)
@@ -695,7 +894,41 @@ class System(object):
             sum(len(v) for v in self.warnings.itervalues()),))
 
 
+    def preParseModules(self):
+        """Parse the source of all unprocessed modules up front, using
+        C{options.parsejobs} processes.
+
+        Parsing one module does not depend on any other, unlike
+        processing the ASTs, which has to happen in the order that
+        modules are needed.  The ASTs are kept in C{self.preparsed} until
+        L{processModule} gets to them.
+        """
+        paths = set()
+        for mod in self.unprocessed_modules:
+            if getattr(mod, 'filepath', None) is not None:
+                paths.add(mod.filepath)
+        builder = self.defaultBuilder(self)
+        self.preparsed.update(
+            builder.parseFiles(sorted(paths), self.options.parsejobs))
+
     def process(self):
+        if self.options.parsejobs > 1:
+            self.preParseModules()
         while self.unprocessed_modules:
             mod = iter(self.unprocessed_modules).next()
             self.processModule(mod)
+        self._importindex = {}
+        self._resolvememo = {}
+        self.computePrivacy()
+
+    def computePrivacy(self):
+        """Work out the privacy class of every object in the system in one
+        go, so that L{Documentable.privacyClass} doesn't have to call
+        L{privacyClass} again and again while the HTML is written.
+
+        This is done at the end of L{process}; call it again if something
+        that L{privacyClass} depends on changes after that.
+        """
+        privacyClass = self.privacyClass
+        self._privacy = dict([(ob, privacyClass(ob))
+                              for ob in self.orderedallobjects])
@@ -311,7 +311,7 @@ class ClassPage(CommonPage):
 
     def extras(self):
         r = super(ClassPage, self).extras()
-        scs = sorted(self.ob.subclasses, key=lambda o:o.fullName().lower())
+        scs = self.ob.system.classHierarchy().subclasses(self.ob)
         if not scs:
             return r
         p = maybeShortenList(self.ob.system, "Known subclasses: ",
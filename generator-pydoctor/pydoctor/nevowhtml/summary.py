@@ -18,9 +18,6 @@ def moduleSummary(modorpack):
         ul[moduleSummary(m)]
     return r[ul]
 
-def _lckey(x):
-    return x.fullName().lower()
-
 class ModuleIndexPage(page.Element):
     filename = 'moduleIndex.html'
     docFactory = loaders.xmlfile(templatefile('summary.html'))
@@ -40,19 +37,7 @@ class ModuleIndexPage(page.Element):
         return tag().clear()["Module Index"]
 
 def findRootClasses(system):
-    roots = {}
-    for cls in system.objectsOfType(model.Class):
-        if ' ' in cls.name or not cls.isVisible:
-            continue
-        if cls.bases:
-            for n, b in zip(cls.bases, cls.baseobjects):
-                if b is None or not b.isVisible:
-                    roots.setdefault(n, []).append(cls)
-                elif b.system is not system:
-                    roots[b.fullName()] = b
-        else:
-            roots[cls.fullName()] = cls
-    return sorted(roots.items(), key=lambda x:x[0].lower())
+    return system.classHierarchy().roots
 
 def subclassesFrom(hostsystem, cls, anchors):
     r = tags.li()
@@ -61,11 +46,10 @@ def subclassesFrom(hostsystem, cls, anchors):
         r[tags.a(name=name)]
         anchors.add(name)
     r[taglink(cls), ' - ', epydoc2stan.doc2html(cls, summary=True)[0]]
-    scs = [sc for sc in cls.subclasses if sc.system is hostsystem and ' ' not in sc.fullName()
-           and sc.isVisible]
+    scs = hostsystem.classHierarchy().visibleSubclasses(cls)
     if len(scs) > 0:
         ul = tags.ul()
-        for sc in sorted(scs, key=_lckey):
+        for sc in scs:
             ul[subclassesFrom(hostsystem, sc, anchors)]
         r[ul]
     return r
@@ -89,7 +73,7 @@ class ClassIndexPage(page.Element):
                 item = tags.li[b]
                 if o:
                     ul = tags.ul()
-                    for sc in sorted(o, key=_lckey):
+                    for sc in o:
                         ul[subclassesFrom(self.system, sc, anchors)]
                     item[ul]
                 t[item]
@@ -2,17 +2,20 @@
 
 from pydoctor.nevowhtml.util import link, templatefile
 from pydoctor.nevowhtml import pages, summary
+from pydoctor.nevowhtml.pages.table import ChildTable
 
 from nevow import flat
 
 import os, shutil
 
+# Pages are handed to --html-jobs workers in chunks of this many.
+WORKER_CHUNK_SIZE = 16
+
 class NevowWriter:
     def __init__(self, filebase):
         self.base = filebase
         self.written_pages = 0
         self.total_pages = 0
-        self.dry_run = False
 
     def prepOutputDirectory(self):
         if not os.path.exists(self.base):
@@ -27,12 +30,32 @@ class NevowWriter:
                             os.path.join(self.base, 'pydoctor.js'))
 
     def writeIndividualFiles(self, obs, functionpages=False):
-        self.dry_run = True
-        for ob in obs:
-            self.writeDocsFor(ob, functionpages=functionpages)
-        self.dry_run = False
+        plan = self.planPages(obs, functionpages)
+        self.system.pagePlan = plan
+        self.writePlan(plan)
+
+    def planPages(self, obs, functionpages=False):
+        """Work out which pages to write for C{obs} and their contents.
+
+        @return: A list of C{(fullName, page class name, filename)}
+            tuples, one for each page, in the order they should be
+            written.  The list only contains strings, so it can be
+            pickled along with the system.
+        """
+        plan = []
         for ob in obs:
-            self.writeDocsFor(ob, functionpages=functionpages)
+            self._planDocsFor(ob, functionpages, plan)
+        return plan
+
+    def _planDocsFor(self, ob, functionpages, plan):
+        if not ob.isVisible:
+            return
+        isfunc = ob.document_in_parent_page
+        if (isfunc and functionpages) or not isfunc:
+            plan.append((ob.fullName(), self.pageClassFor(ob).__name__,
+                         link(ob)))
+        for o in ob.orderedcontents:
+            self._planDocsFor(o, functionpages, plan)
 
     def writeModuleIndex(self, system):
         import time
@@ -45,34 +68,104 @@ class NevowWriter:
             f.close()
             system.msg('html', "took %fs"%(time.time() - T), wantsnl=False)
 
-    def writeDocsFor(self, ob, functionpages):
-        if not ob.isVisible:
+    def writePlan(self, plan):
+        """Write the pages in C{plan}, as returned by L{planPages}."""
+        self.total_pages += len(plan)
+        jobs = self.system.options.htmljobs
+        if jobs > 1 and len(plan) > WORKER_CHUNK_SIZE:
+            self._writePlanInWorkers(plan, jobs)
             return
-        isfunc = ob.document_in_parent_page
-        if (isfunc and functionpages) or not isfunc:
-            if self.dry_run:
-                self.total_pages += 1
-            else:
-                f = open(os.path.join(self.base, link(ob)), 'w')
-                self.writeDocsForOne(ob, f)
-                f.close()
-        for o in ob.orderedcontents:
-            self.writeDocsFor(o, functionpages)
+        for fullName, pclassname, filename in plan:
+            f = open(os.path.join(self.base, filename), 'w')
+            self.writePage(self.system.allobjects[fullName],
+                           getattr(pages, pclassname), f)
+            f.close()
 
-    def writeDocsForOne(self, ob, fobj):
-        if not ob.isVisible:
-            return
+    def _writePlanInWorkers(self, plan, jobs):
+        """Write the pages in C{plan} using C{jobs} worker processes.
+
+        Each worker gets a copy of the system once, when it starts, and is
+        then sent chunks of the plan.  The epytext problems and warnings
+        found while rendering are sent back, and merged into the system
+        in plan order, and the workers' docstring rendering statistics
+        are added to the system's.
+        """
+        import multiprocessing
+        chunks = [plan[i:i+WORKER_CHUNK_SIZE]
+                  for i in range(0, len(plan), WORKER_CHUNK_SIZE)]
+        pool = multiprocessing.Pool(jobs, _initWorker, (self,))
+        try:
+            for (count, problems, warnings,
+                 renders, hits) in pool.imap(_writeChunk, chunks):
+                for fn in problems:
+                    if fn not in self.system.epytextproblems:
+                        self.system.epytextproblems.append(fn)
+                for type, entries in warnings.iteritems():
+                    self.system.warnings.setdefault(type, []).extend(entries)
+                self.system.doc2htmlrenders += renders
+                self.system.doc2htmlhits += hits
+                self.written_pages += count
+                self.system.progress('html', self.written_pages,
+                                     self.total_pages, 'pages written')
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def writeDocsFor(self, ob, functionpages):
+        self.writePlan(self.planPages([ob], functionpages))
+
+    def pageClassFor(self, ob):
         # brrrrrrrr!
         d = pages.__dict__
         for c in ob.__class__.__mro__:
             n = c.__name__ + 'Page'
             if n in d:
-                pclass = d[n]
-                break
-        else:
-            pclass = pages.CommonPage
+                return d[n]
+        return pages.CommonPage
+
+    def writeDocsForOne(self, ob, fobj):
+        if not ob.isVisible:
+            return
+        self.writePage(ob, self.pageClassFor(ob), fobj)
+
+    def writePage(self, ob, pclass, fobj):
         self.system.msg('html', str(ob), thresh=1)
         page = pclass(ob)
         self.written_pages += 1
         self.system.progress('html', self.written_pages, self.total_pages, 'pages written')
-        fobj.write(flat.flatten(page))
+        fobj.write(flattenPage(page))
+
+
+def flattenPage(page):
+    # Number the tables on each page from 1, so that a page comes out the
+    # same whichever process writes it.
+    ChildTable.last_id = 0
+    return flat.flatten(page)
+
+_workerWriter = None
+
+def _initWorker(writer):
+    global _workerWriter
+    _workerWriter = writer
+
+def _writeChunk(chunk):
+    """Write some pages of the plan, in a worker process.
+
+    @return: the number of pages written, the epytext problems and
+        warnings found while writing them, and the number of docstrings
+        rendered and of docstring cache hits while writing them.
+    """
+    writer = _workerWriter
+    system = writer.system
+    system.epytextproblems = []
+    system.warnings = {}
+    renders, hits = system.doc2htmlrenders, system.doc2htmlhits
+    for fullName, pclassname, filename in chunk:
+        ob = system.allobjects[fullName]
+        system.msg('html', str(ob), thresh=1)
+        page = getattr(pages, pclassname)(ob)
+        f = open(os.path.join(writer.base, filename), 'w')
+        f.write(flattenPage(page))
+        f.close()
+    return (len(chunk), system.epytextproblems, system.warnings,
+            system.doc2htmlrenders - renders, system.doc2htmlhits - hits)
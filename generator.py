@@ -24,6 +24,7 @@ class Generator(object):
   OUTPUT_ZIP  = "appengine/%s.zip"
 
   EPYDOC_MAGIC = "@@BABBLEDRIVE_NAMEVERSION@@"
+  EPYDOC_SHARED_FILES = ["epydoc.css", "epydoc.js", "crarr.png"]
 
   SPHINX_V2_MARKER   = "# Sphinx inventory version 2"
   SPHINX_ZLIB_MARKER = "# The remainder of this file is compressed using zlib.\n"
@@ -215,24 +216,25 @@ class Generator(object):
   def TakeEpydocOutput(self, path):
     self.logger.info("taking epydoc output from %s" % path)
 
+    if path.endswith(".zip"):
+      self._TakeEpydocZip(path)
+      return
+
     babbledrive_data = os.path.join(path, "babbledrive-data.js")
     if not os.path.exists(babbledrive_data):
       raise GeneratorError("The generated file '%s' was not found" % babbledrive_data)
 
     # Replace the magic string in the babbledrive data file
     data = open(babbledrive_data).read()
-    data = data.replace(self.EPYDOC_MAGIC, "%s-%s" % (self.name, self.version))
-    open(babbledrive_data, 'w').write(data)
+    open(babbledrive_data, 'w').write(self._FixEpydocData(data))
 
     # Replace references to epydoc.css or epydoc.js in the html files
     for filename in glob.glob(os.path.join(path, "*.html")):
       data = open(filename).read()
-      data = re.sub(r'(epydoc.(css|js))', r'../../\1', data)
-      data = re.sub(r'(crarr.png)', r'../../images/\1', data)
-      open(filename, 'w').write(data)
+      open(filename, 'w').write(self._FixEpydocHtml(data))
 
     # Remove shared files
-    for filename in ["epydoc.css", "epydoc.js", "crarr.png"]:
+    for filename in self.EPYDOC_SHARED_FILES:
       filepath = os.path.join(path, filename)
       if os.path.exists(filepath):
         os.remove(filepath)
@@ -241,6 +243,53 @@ class Generator(object):
     self._TakeData(babbledrive_data)
     self._TakeDocs(path)
 
+  def _TakeEpydocZip(self, path):
+    # Epydoc wrote its output straight to a zip archive; copy its members
+    # into the output zip without going through a directory on disk.
+    source = zipfile.ZipFile(path)
+    names = source.namelist()
+    if "babbledrive-data.js" not in names:
+      raise GeneratorError("The generated file 'babbledrive-data.js' was not "
+                           "found in '%s'" % path)
+
+    self._RemoveOldOutput()
+
+    self.logger.info("installing %s" % self.output_data)
+    data = source.read("babbledrive-data.js")
+    open(self.output_data, 'w').write(self._FixEpydocData(data))
+
+    self.logger.info("archiving %s to %s" % (path, self.output_zip))
+    output = zipfile.ZipFile(self.output_zip, 'w', zipfile.ZIP_DEFLATED)
+
+    # Archives written by older epydocs can hold the same page more than once
+    # (when a module is shadowed by a variable of the same name); read()
+    # returns the last copy, which is the one a directory would have kept.
+    seen = set()
+    for name in names:
+      if name in seen:
+        continue
+      seen.add(name)
+      if name == "babbledrive-data.js" or name in self.EPYDOC_SHARED_FILES:
+        continue
+
+      data = source.read(name)
+      if name.endswith(".html") and "/" not in name:
+        data = self._FixEpydocHtml(data)
+      output.writestr(name, data)
+
+    output.close()
+    source.close()
+
+  def _FixEpydocData(self, data):
+    # Replace the magic string in the babbledrive data file
+    return data.replace(self.EPYDOC_MAGIC, "%s-%s" % (self.name, self.version))
+
+  def _FixEpydocHtml(self, data):
+    # Point references to the shared files at the app's copies
+    data = re.sub(r'(epydoc.(css|js))', r'../../\1', data)
+    data = re.sub(r'(crarr.png)', r'../../images/\1', data)
+    return data
+
   def _RemoveOldOutput(self):
     self.logger.info("removing old data")
     if os.path.exists(self.output_data):
@@ -332,18 +381,18 @@ class Generator(object):
 
     pickle_path = os.path.join(path, "babbledrive-pickle")
     html_path   = os.path.join(path, "babbledrive-apidocs")
-    system = pickle.load(open(pickle_path))
 
     items = []
-    for o in system.allobjects.values():
-      name = o.fullName()
-      type_index = self.PYDOCTOR_TYPES[o.kind]
+    for name, kind, parent, bases, page in self._PydoctorSymbols(pickle_path):
+      type_index = self.PYDOCTOR_TYPES[kind]
 
-      if o.kind == "Class" and "Exception" in o.bases:
+      if kind == "Class" and "Exception" in bases:
         type_index = 2
 
-      if o.kind in ["Method", "Function"]:
-        url = "%s.html#%s" % (o.parent.fullName(), o.name)
+      if page is not None:
+        url = page
+      elif kind in ["Method", "Function"]:
+        url = "%s.html#%s" % (parent, name.rsplit(".", 1)[-1])
       else:
         url = "%s.html" % name
 
@@ -362,6 +411,35 @@ class Generator(object):
       self.name, self.version, json.dumps(items, separators=(',', ':'))))
     output_file.close()
 
+  def _PydoctorSymbols(self, pickle_path):
+    # Yields (fullName, kind, parent's fullName, bases, page) for every object
+    # in the system.  Newer pydoctors write a flat symbol table next to the
+    # pickle which can be streamed without rebuilding the object graph; only
+    # fall back to loading the pickle itself when it isn't there, or when it
+    # is older than the pickle (left behind by an earlier run, say by a
+    # pydoctor that didn't write one).
+    symbols_path = pickle_path + ".symbols"
+    if (os.path.exists(symbols_path) and
+        os.path.getmtime(symbols_path) >= os.path.getmtime(pickle_path)):
+      for line in open(symbols_path):
+        yield json.loads(line)
+      return
+
+    system = pickle.load(open(pickle_path))
+
+    # The pages pydoctor wrote, if it recorded them
+    pages = {}
+    for fullName, pclass, filename in system.pagePlan or []:
+      pages[fullName] = filename
+
+    for o in system.allobjects.values():
+      name = o.fullName()
+      if o.parent is None:
+        parent = None
+      else:
+        parent = o.parent.fullName()
+      yield name, o.kind, parent, getattr(o, "bases", None), pages.get(name)
+
   def TakeDevhelpOutput(self, path):
     self.logger.info("taking devhelp output from %s" % path)
 
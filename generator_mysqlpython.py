@@ -13,8 +13,8 @@ class Generator(generator.Generator):
     tarball = self.DownloadSource(self.URL % self.version)
     source = self.ExtractSource(tarball)
 
-    self.Run(["epydoc", "-o", "docs-babbledrive", "MySQLdb"], cwd=source)
-    self.TakeEpydocOutput(os.path.join(source, "docs-babbledrive"))
+    self.Run(["epydoc", "-o", "docs-babbledrive.zip", "MySQLdb"], cwd=source)
+    self.TakeEpydocOutput(os.path.join(source, "docs-babbledrive.zip"))
 
 
 def MakeGenerators():
@@ -19,8 +19,8 @@ class Generator(generator.Generator):
     py_files = glob.glob(os.path.join(lib_tk_dir, "*.py"))
     modules = [os.path.basename(x)[:-3] for x in py_files]
 
-    self.Run(["epydoc"] + modules, cwd=lib_tk_dir)
-    self.TakeEpydocOutput(os.path.join(lib_tk_dir, "html"))
+    self.Run(["epydoc", "-o", "html.zip"] + modules, cwd=lib_tk_dir)
+    self.TakeEpydocOutput(os.path.join(lib_tk_dir, "html.zip"))
 
 
 def MakeGenerators():